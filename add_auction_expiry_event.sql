@@ -0,0 +1,54 @@
+USE art_auction_db;
+
+-- Close expired auctions inside MySQL on a schedule instead of from the application.
+-- The event scheduler must be on (set event_scheduler=ON in my.cnf to keep it after a restart):
+SET GLOBAL event_scheduler = ON;
+
+DELIMITER //
+
+DROP PROCEDURE IF EXISTS close_expired_auctions//
+
+CREATE PROCEDURE close_expired_auctions()
+BEGIN
+    START TRANSACTION;
+
+    -- Lock the auctions that have ended (range scan on idx_active's (status, end_time) prefix)
+    CREATE TEMPORARY TABLE IF NOT EXISTS expired_auctions (auction_id INT PRIMARY KEY);
+    TRUNCATE TABLE expired_auctions;
+    INSERT INTO expired_auctions
+        SELECT auction_id FROM auctions
+        WHERE status = 'active' AND end_time <= NOW()
+        FOR UPDATE;
+
+    -- The highest bid wins
+    UPDATE auctions a
+    JOIN expired_auctions e ON a.auction_id = e.auction_id
+    SET a.status = 'completed',
+        a.winner_id = (SELECT b.bidder_id FROM bids b
+                       WHERE b.auction_id = a.auction_id
+                       ORDER BY b.bid_amount DESC, b.bid_time ASC
+                       LIMIT 1);
+
+    -- Notify winners
+    INSERT INTO notifications (user_id, message, type)
+        SELECT a.winner_id,
+               CONCAT('Congratulations! You won the auction for ''', a.title, ''''),
+               'won'
+        FROM auctions a
+        JOIN expired_auctions e ON a.auction_id = e.auction_id
+        WHERE a.winner_id IS NOT NULL;
+
+    DROP TEMPORARY TABLE expired_auctions;
+    COMMIT;
+END//
+
+DELIMITER ;
+
+DROP EVENT IF EXISTS close_expired_auctions_event;
+
+CREATE EVENT close_expired_auctions_event
+    ON SCHEDULE EVERY 30 SECOND
+    DO CALL close_expired_auctions();
+
+-- Show the installed event
+SHOW EVENTS;
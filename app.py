@@ -1,21 +1,49 @@
-from flask import Flask, render_template, request, redirect, url_for, flash, session, jsonify
+from flask import Flask, render_template, request, redirect, url_for, flash, session, jsonify, send_from_directory, g, make_response, Response, abort
+from flask.json.provider import DefaultJSONProvider
+from flask_compress import Compress
 from flask_login import LoginManager, UserMixin, login_user, logout_user, login_required, current_user
-from werkzeug.utils import secure_filename
-from werkzeug.security import check_password_hash
+from werkzeug.security import check_password_hash, safe_join
 from datetime import datetime, timedelta
 import os
+import re
 import json
-import imghdr
+import hashlib
+from decimal import Decimal
+from functools import lru_cache
+import orjson
 from PIL import Image
 from config import Config
 from db_operations import db_manager
-from decimal import Decimal
+from tasks import stage_artwork_upload, enqueue_artwork, recover_artwork_uploads, thumbnail_name, has_thumbnails, ARTWORK_FAILED
+from cache import redis_client, cache
+from apscheduler.schedulers.background import BackgroundScheduler
+
+# JSON provider backed by orjson for the polled API endpoints
+class ORJSONProvider(DefaultJSONProvider):
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=self.default, option=orjson.OPT_NON_STR_KEYS).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
 
 # Initialize Flask app
 app = Flask(__name__)
+app.json = ORJSONProvider(app)
 app.config.from_object(Config)
 Config.init_app(app)
 
+# Store sessions server-side in Redis when it is available
+if redis_client:
+    from flask_session import Session
+    app.config.update(SESSION_TYPE='redis', SESSION_REDIS=redis_client)
+    Session(app)
+
+# Initialize cache
+cache.init_app(app)
+
+# Compress HTML and JSON responses
+Compress(app)
+
 # Initialize Flask-Login
 login_manager = LoginManager()
 login_manager.init_app(app)
@@ -32,49 +60,170 @@ class User(UserMixin):
 
 @login_manager.user_loader
 def load_user(user_id):
+    cache_key = f"user:{user_id}"
+    if redis_client:
+        cached = redis_client.get(cache_key)
+        if cached:
+            user_data = json.loads(cached)
+            if user_data.get('created_at'):
+                user_data['created_at'] = datetime.fromisoformat(user_data['created_at'])
+            return User(user_data)
+
     user_data = db_manager.get_user_by_id(int(user_id))
     if user_data:
+        if redis_client:
+            redis_client.setex(cache_key, Config.USER_CACHE_TTL, json.dumps(user_data, default=str))
         return User(user_data)
     return None
 
+# Take one timestamp per request for views and template filters to share
+@app.before_request
+def set_request_time():
+    g.now = datetime.now()
+
 # Context processor to make wallet balance available to all templates
 @app.context_processor
 def inject_wallet_balance():
     if current_user.is_authenticated:
-        wallet_balance = db_manager.get_wallet_balance(current_user.id)
-        return dict(user_wallet_balance=wallet_balance)
+        return dict(user_wallet_balance=current_wallet_balance())
     return dict(user_wallet_balance=0.00)
 
+# Cached read helpers for the hottest listing queries
+@cache.cached(timeout=Config.CATEGORIES_CACHE_TTL, key_prefix='cats')
+def cached_categories():
+    return db_manager.get_categories()
+
+@cache.memoize(timeout=Config.AUCTION_LIST_CACHE_TTL)
+def cached_active_auctions(**filters):
+    return db_manager.get_active_auctions(**filters)
+
+@cache.cached(timeout=Config.AUCTION_STATS_CACHE_TTL, key_prefix='auction_stats')
+def cached_auction_stats():
+    return db_manager.get_auction_stats()
+
+def invalidate_auction_cache():
+    """Drop cached auction listings after a write"""
+    # The refill must not come from a replica that has not seen the write yet
+    db_manager.mark_recent_write()
+    cache.delete_memoized(cached_active_auctions)
+
+def artwork_processed():
+    """Drop cached listings once a background job attaches (or gives up on) an image"""
+    with app.app_context():
+        invalidate_auction_cache()
+
+@cache.memoize(timeout=Config.WALLET_BALANCE_CACHE_TTL)
+def cached_wallet_balance(user_id):
+    return db_manager.get_wallet_balance(user_id)
+
+def current_wallet_balance(fresh=False):
+    """Logged-in user's wallet balance, looked up at most once per request
+
+    fresh=True reads the database instead of the shared cache, for pages that
+    show or act on the balance; the navbar then reuses that value.
+    """
+    if fresh and not g.get('wallet_balance_fresh'):
+        g.wallet_balance = db_manager.get_wallet_balance(current_user.id)
+        g.wallet_balance_fresh = True
+    elif 'wallet_balance' not in g:
+        g.wallet_balance = cached_wallet_balance(current_user.id)
+    return g.wallet_balance
+
+def invalidate_wallet_cache(*user_ids):
+    """Drop cached wallet balances after money moves"""
+    g.pop('wallet_balance', None)
+    g.pop('wallet_balance_fresh', None)
+    for user_id in user_ids:
+        cache.delete_memoized(cached_wallet_balance, user_id)
+
+# Helper to answer repeat page views with 304 Not Modified
+def auction_list_etag(*auction_lists):
+    """ETag parts identifying a set of listed auctions and their last change"""
+    auctions = [a for auctions in auction_lists for a in auctions]
+    last_update = max((a.get('updated_at') for a in auctions if a.get('updated_at')), default=None)
+    return [[a['auction_id'] for a in auctions], last_update]
+
+def conditional_page(etag_parts, render):
+    """Render a page with ETag/Cache-Control headers, skipping the render on a match"""
+    # Pages with pending flash messages must always be rendered
+    if '_flashes' in session:
+        return render()
+
+    if current_user.is_authenticated:
+        etag_parts = [current_user.id, current_wallet_balance()] + etag_parts
+    # Countdowns ("3 hours left") are rendered server-side, so the page changes every minute
+    etag_parts = [g.now.strftime('%Y%m%d%H%M')] + etag_parts
+    etag = hashlib.md5(repr(etag_parts).encode()).hexdigest()
+
+    # Flask-Compress tags compressed responses' ETags with ':<algorithm>'
+    if any(request.if_none_match.contains(tag)
+           for tag in [etag] + [f"{etag}:{algorithm}" for algorithm in Config.COMPRESS_ALGORITHM]):
+        response = app.response_class(status=304)
+    else:
+        response = make_response(render())
+    response.set_etag(etag)
+
+    if current_user.is_authenticated:
+        response.headers['Cache-Control'] = 'private, no-cache'
+    else:
+        # s-maxage lets a reverse proxy answer anonymous views without reaching Flask
+        response.headers['Cache-Control'] = 'public, max-age=30, s-maxage=15, stale-while-revalidate=60'
+    response.vary.add('Cookie')
+    return response
+
 # Helper function to check allowed file extensions
-def allowed_file(filename):
-    return '.' in filename and \
-           filename.rsplit('.', 1)[1].lower() in Config.ALLOWED_EXTENSIONS
+_ALLOWED_EXTENSIONS = frozenset(Config.ALLOWED_EXTENSIONS)
 
-# Helper function to resize and save images
-def save_artwork_image(file):
-    if file and allowed_file(file.filename):
-        try:
-            filename = secure_filename(file.filename)
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            filename = f"{timestamp}_{filename}"
-            filepath = os.path.join(Config.UPLOAD_FOLDER, filename)
-
-            img = Image.open(file)
-            if img.mode in ('RGBA', 'LA', 'P'):
-                rgb_img = Image.new('RGB', img.size, (255, 255, 255))
-                rgb_img.paste(img, mask=img.split()[-1] if img.mode == 'RGBA' else None)
-                img = rgb_img
-
-            max_size = (1200, 1200)
-            img.thumbnail(max_size, Image.Resampling.LANCZOS)
-            img.save(filepath, 'JPEG', quality=85, optimize=True)
-            return filename
-        except Exception:
-            return None
+def allowed_file(filename):
+    _, dot, extension = filename.rpartition('.')
+    return bool(dot) and extension.lower() in _ALLOWED_EXTENSIONS
+
+# Helper function to identify an upload from its magic bytes, before Pillow looks at it
+def sniff_image_kind(file):
+    head = file.stream.read(12)
+    file.stream.seek(0)
+    if head.startswith(b'\xff\xd8\xff'):
+        return 'jpeg'
+    if head.startswith(b'\x89PNG\r\n\x1a\n'):
+        return 'png'
+    if head[:6] in (b'GIF87a', b'GIF89a'):
+        return 'gif'
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        return 'webp'
     return None
 
+# Helper function to check the upload is an image Pillow can read (header only, no decode)
+def is_readable_image(file):
+    try:
+        Image.open(file.stream)
+        return True
+    except Exception:
+        return False
+    finally:
+        file.stream.seek(0)
+
 
 # Routes
+@app.route('/media/<path:filename>')
+def media(filename):
+    """Serve uploaded artwork, letting nginx stream the file when configured"""
+    if Config.MEDIA_ACCEL_PREFIX:
+        # nginx resolves the path itself, so it must not escape the uploads alias
+        internal_path = safe_join(Config.MEDIA_ACCEL_PREFIX, filename)
+        if internal_path is None:
+            abort(404)
+        response = app.response_class()
+        response.headers['X-Accel-Redirect'] = internal_path
+        # Let nginx set the type from the file it serves
+        del response.headers['Content-Type']
+    else:
+        response = send_from_directory(Config.UPLOAD_FOLDER, filename)
+
+    # Artwork files are named by content hash and never rewritten, so browsers
+    # and CDNs can keep them without revalidating
+    response.headers['Cache-Control'] = f'public, max-age={Config.MEDIA_CACHE_MAX_AGE}, immutable'
+    return response
+
 @app.route("/about")
 def about():
     return render_template("about.html")
@@ -91,15 +240,16 @@ def contact():
 @app.route('/')
 def index():
     """Home page showing featured auctions"""
-    # Get random auctions for featured section
-    auctions = db_manager.get_active_auctions(limit=6, random_order=True)
-    # Get random auctions for hero slider (5 slides)
-    slider_auctions = db_manager.get_active_auctions(limit=5, random_order=True)
-    if current_user.is_authenticated:
-        notifications = db_manager.get_user_notifications(current_user.id, unread_only=True)
-    else:
-        notifications = []
-    return render_template('index.html', auctions=auctions, slider_auctions=slider_auctions, notifications=notifications)
+    # Get random auctions for the hero slider (5 slides) and featured section (6)
+    # with a single query
+    random_auctions = cached_active_auctions(limit=11, random_order=True)
+    slider_auctions = random_auctions[:5]
+    auctions = random_auctions[5:]
+
+    # The navbar badge loads notifications itself, so the page does not depend on them
+    etag_parts = auction_list_etag(auctions, slider_auctions)
+    return conditional_page(etag_parts, lambda: render_template(
+        'index.html', auctions=auctions, slider_auctions=slider_auctions))
 
 @app.route('/register', methods=['GET', 'POST'])
 def register():
@@ -161,6 +311,8 @@ def login():
 @login_required
 def logout():
     """Logout user"""
+    if redis_client:
+        redis_client.delete(f"user:{current_user.id}")
     logout_user()
     flash('You have been logged out.', 'info')
     return redirect(url_for('index'))
@@ -169,38 +321,26 @@ def logout():
 @login_required
 def dashboard():
     """User dashboard showing their auctions, bids, and notifications"""
-    # Get user's auctions
-    my_auctions = db_manager.get_user_auctions(current_user.id)
-    
-    # Get user's bids
-    my_bids = db_manager.get_user_bids(current_user.id)
-
-    # Get won auctions
-    won_auctions = db_manager.get_won_auctions(current_user.id)
-
-    # Get notifications
-    notifications = db_manager.get_user_notifications(current_user.id)
-
-    # Get pending payments count
-    pending_payments = db_manager.get_pending_payments(current_user.id)
-    pending_payments_count = len(pending_payments)
-
-    # Mark notifications as read
-    db_manager.mark_notifications_read(current_user.id)
+    # Get user's auctions, bids, won auctions, notifications and pending payments
+    # (notifications are marked read in the same round-trip)
+    bundle = db_manager.get_dashboard_bundle(current_user.id)
+    pending_payments_count = len(bundle['pending_payments'])
 
     return render_template('dashboard.html',
-                         my_auctions=my_auctions,
-                         my_bids=my_bids,
-                         won_auctions=won_auctions,
-                         notifications=notifications,
-                         pending_payments_count=pending_payments_count)
+                         my_auctions=bundle['my_auctions'],
+                         my_bids=bundle['my_bids'],
+                         won_auctions=bundle['won_auctions'],
+                         notifications=bundle['notifications'],
+                         pending_payments_count=pending_payments_count,
+                         total_spent=bundle['total_spent'],
+                         total_earned=bundle['total_earned'])
 
 
 @app.route('/create_auction', methods=['GET', 'POST'])
 @login_required
 def create_auction():
     """Create new auction page"""
-    categories = db_manager.get_categories()
+    categories = cached_categories()
     image_error = None  # <--- added
 
     if request.method == 'POST':
@@ -220,24 +360,28 @@ def create_auction():
             if file.filename == '':
                 flash('Please select an image file', 'danger')
             elif file and allowed_file(file.filename):
-                # Save image
-                filename = save_artwork_image(file)
-                if filename:
-                    # Create auction
+                if sniff_image_kind(file) and is_readable_image(file):
+                    # Stage the raw upload; resizing happens in the background
+                    staging_path = stage_artwork_upload(file)
+
+                    # Create auction (image_path is filled in once processing finishes)
                     success, result = db_manager.create_auction(
                         seller_id=current_user.id,
                         title=title,
                         description=description,
-                        image_path=filename,
+                        image_path=None,
                         category_id=int(category_id) if category_id else None,
                         starting_bid=float(starting_bid),
                         duration_days=int(duration_days)
                     )
                     
                     if success:
+                        enqueue_artwork(staging_path, result, on_done=artwork_processed)
+                        invalidate_auction_cache()
                         flash('Auction created successfully!', 'success')
                         return redirect(url_for('auction_detail', auction_id=result))
                     else:
+                        os.remove(staging_path)
                         flash(f'Error creating auction: {result}', 'danger')
                 else:
                     flash('❌ Unsupported image format. Please upload a JPG, PNG, or GIF.', 'danger')
@@ -263,7 +407,7 @@ def edit_auction(auction_id):
         flash('You are not authorized to edit this auction.', 'danger')
         return redirect(url_for('dashboard'))
 
-    categories = db_manager.get_categories()
+    categories = cached_categories()
 
     # Calculate current duration for the form
     if auction['end_time'] and auction['created_at']:
@@ -289,6 +433,7 @@ def edit_auction(auction_id):
                 original_end_time=auction['end_time']
             )
             if success:
+                invalidate_auction_cache()
                 flash('Auction updated successfully!', 'success')
                 return redirect(url_for('auction_detail', auction_id=auction_id))
             else:
@@ -313,6 +458,7 @@ def delete_auction(auction_id):
     else:
         success = db_manager.delete_auction(auction_id)
         if success:
+            invalidate_auction_cache()
             flash('Auction deleted successfully.', 'success')
         else:
             flash('Failed to delete auction.', 'danger')
@@ -337,18 +483,14 @@ def sell_now(auction_id):
         flash('You are not authorized to perform this action.', 'danger')
         return redirect(url_for('dashboard'))
 
-    highest_bid = db_manager.get_highest_bid(auction_id)
-    if not highest_bid:
+    if not auction['top_bidder_id']:
         flash("Cannot sell immediately — no bids have been placed yet.", "warning")
         return redirect(url_for('auction_detail', auction_id=auction_id))
 
+    # Marks the auction sold and notifies the winner in one transaction
     success, message = db_manager.sell_now(auction_id)
     if success:
-        # Notify winner
-        db_manager.create_notification(
-            user_id=highest_bid['bidder_id'],
-            message=f"You won '{auction['title']}'!"
-        )
+        invalidate_auction_cache()
         flash(message, "success")
     else:
         flash(message, "danger")
@@ -360,37 +502,12 @@ def sell_now(auction_id):
 @login_required
 def payment_center():
     """Payment center showing items that need payment"""
-    # Get pending payments
-    pending_payments = db_manager.get_pending_payments(current_user.id)
-
-    # Get completed payments (won auctions that are paid)
-    conn = db_manager.get_connection()
-    completed_payments = []
-    if conn:
-        try:
-            cursor = conn.cursor(dictionary=True)
-            query = """SELECT a.*, u.username as seller_name, c.category_name,
-                      COALESCE(a.sold_price, a.current_bid) as final_price
-                      FROM auctions a
-                      JOIN users u ON a.seller_id = u.user_id
-                      LEFT JOIN categories c ON a.category_id = c.category_id
-                      WHERE a.winner_id = %s
-                      AND a.status IN ('completed', 'sold')
-                      AND a.payment_status = 'paid'
-                      ORDER BY a.end_time DESC
-                      LIMIT 10"""
-            cursor.execute(query, (current_user.id,))
-            completed_payments = cursor.fetchall()
-        except Exception as e:
-            print(f"Error getting completed payments: {e}")
-        finally:
-            if conn.is_connected():
-                cursor.close()
-                conn.close()
+    # Get pending payments and completed payments (won auctions that are paid)
+    bundle = db_manager.get_payment_bundle(current_user.id)
 
     return render_template('payment.html',
-                         pending_payments=pending_payments,
-                         completed_payments=completed_payments)
+                         pending_payments=bundle['pending_payments'],
+                         completed_payments=bundle['completed_payments'])
 
 @app.route('/payment/<int:auction_id>')
 @login_required
@@ -412,12 +529,11 @@ def payment_detail(auction_id):
         flash('Payment has already been completed for this auction', 'info')
         return redirect(url_for('payment_center'))
 
-    # Add final_price field
-    auction['final_price'] = auction.get('sold_price') or auction.get('current_bid')
+    # final_price and the balance are both DECIMAL columns, so they compare as Decimals
+    auction['final_price'] = auction['final_price'] or Decimal('0.00')
 
-    # Get user's wallet balance
-    raw_balance = db_manager.get_wallet_balance(current_user.id)
-    wallet_balance = Decimal(str(raw_balance))
+    # Get user's wallet balance (shared with the navbar)
+    wallet_balance = current_wallet_balance(fresh=True)
 
     return render_template('payment_detail.html', auction=auction, wallet_balance=wallet_balance)
 
@@ -442,6 +558,7 @@ def process_payment(auction_id):
     if payment_method == 'wallet':
         success, message = db_manager.process_wallet_payment(auction_id, current_user.id)
         if success:
+            invalidate_wallet_cache(current_user.id, auction['seller_id'])
             flash(message, 'success')
         else:
             flash(message, 'danger')
@@ -462,7 +579,7 @@ def process_payment(auction_id):
 @login_required
 def wallet():
     """Wallet page showing balance, transactions, and top-up/cash-out options"""
-    wallet_balance = db_manager.get_wallet_balance(current_user.id)
+    wallet_balance = current_wallet_balance(fresh=True)
     transactions = db_manager.get_wallet_transactions(current_user.id, limit=50)
 
     return render_template('wallet.html',
@@ -495,6 +612,7 @@ def wallet_topup():
         )
 
         if success:
+            invalidate_wallet_cache(current_user.id)
             flash(f'Successfully added RM{amount:.2f} to your wallet!', 'success')
         else:
             flash('Failed to top-up wallet. Please run database migration: mysql -u root -p art_auction_db < add_wallet_system.sql', 'danger')
@@ -521,13 +639,7 @@ def wallet_cashout():
         flash('Please provide bank account details', 'danger')
         return redirect(url_for('wallet'))
 
-    # Check if user has sufficient balance
-    current_balance = db_manager.get_wallet_balance(current_user.id)
-    if current_balance < amount:
-        flash('Insufficient wallet balance', 'danger')
-        return redirect(url_for('wallet'))
-
-    # Deduct from wallet
+    # Deduct from wallet (fails without touching anything if the balance is too low)
     success, message = db_manager.deduct_from_wallet(
         current_user.id,
         amount,
@@ -536,12 +648,29 @@ def wallet_cashout():
     )
 
     if success:
+        invalidate_wallet_cache(current_user.id)
         flash(f'Cash out request for RM{amount:.2f} submitted successfully! Funds will be transferred to your {bank_name} account within 1-3 business days.', 'success')
     else:
         flash(f'Failed to process cash-out: {message}', 'danger')
 
     return redirect(url_for('wallet'))
 
+# Browse sort options: ?sort= value -> (auction column, direction)
+SORT_OPTIONS = {
+    'ending_soon': ('end_time', 'ASC'),
+    'newly_listed': ('created_at', 'DESC'),
+    'price_low': ('current_bid', 'ASC'),
+    'price_high': ('current_bid', 'DESC'),
+    'most_bids': ('bid_count', 'DESC'),
+}
+# Parser for each sort column's keyset cursor value
+KEYSET_SORT_COLUMNS = {
+    'end_time': datetime.fromisoformat,
+    'created_at': datetime.fromisoformat,
+    'current_bid': Decimal,
+    'bid_count': int,
+}
+
 @app.route('/browse')
 def browse_auctions():
     """Browse all active auctions with search and filter"""
@@ -551,50 +680,52 @@ def browse_auctions():
     max_price = request.args.get('max_price', type=float)
     search_term = request.args.get('search', '')
     sort = request.args.get('sort', 'ending_soon')
-    page = request.args.get('page', 1, type=int)
+    after = request.args.get('after')
+    after_id = request.args.get('after_id', type=int)
 
-    # Pagination
     per_page = 12
-    offset = (page - 1) * per_page
-
-    sort_by = None
-    order = "ASC"
-
-    if sort == "ending_soon":
-        sort_by = "end_time"
-        order = "ASC"
-    elif sort == "newly_listed":
-        sort_by = "created_at"
-        order = "DESC"
-    elif sort == "price_low":
-        sort_by = "current_bid"
-        order = "ASC"
-    elif sort == "price_high":
-        sort_by = "current_bid"
-        order = "DESC"
-    elif sort == "most_bids":
-        sort_by = "bid_count"
-        order = "DESC"
+
+    # Unknown sort values fall back to ending soon, so only whitelisted columns reach ORDER BY
+    sort_by, order = SORT_OPTIONS.get(sort, SORT_OPTIONS['ending_soon'])
+
+    # Pages follow a keyset cursor (?after=<value>&after_id=<id>) instead of OFFSET
+    after_value = None
+    if after and after_id:
+        try:
+            after_value = KEYSET_SORT_COLUMNS[sort_by](after)
+        except (ValueError, ArithmeticError):
+            pass
+    if after_value is None:
+        after_id = None
 
     # Get auctions
-    auctions = db_manager.get_active_auctions(
+    auctions = cached_active_auctions(
         category_id=category_id,
         min_price=min_price,
         max_price=max_price,
         search_term=search_term if search_term else None,
         limit=per_page,
-        offset=offset,
         sort_by=sort_by,
-        order=order
+        order=order,
+        after_value=after_value,
+        after_id=after_id
     )
 
+    next_cursor = None
+    if len(auctions) == per_page:
+        last = auctions[-1]
+        last_value = last[sort_by]
+        next_cursor = {'after': last_value.isoformat() if isinstance(last_value, datetime) else str(last_value),
+                       'after_id': last['auction_id']}
+
     # Get categories for filter
-    categories = db_manager.get_categories()
+    categories = cached_categories()
 
     # Get auction stats for quick stats section
-    auction_stats = db_manager.get_auction_stats()
+    auction_stats = cached_auction_stats()
 
-    return render_template(
+    etag_parts = auction_list_etag(auctions) + [request.full_path, auction_stats]
+    return conditional_page(etag_parts, lambda: render_template(
         'browse_auctions.html',
         auctions=auctions,
         categories=categories,
@@ -602,10 +733,11 @@ def browse_auctions():
         search_term=search_term,
         min_price=min_price,
         max_price=max_price,
-        page=page,
         sort=sort,
+        cursor_active=after_value is not None,
+        next_cursor=next_cursor,
         auction_stats=auction_stats
-    )
+    ))
 
 @app.route('/auction/<int:auction_id>')
 def auction_detail(auction_id):
@@ -617,16 +749,16 @@ def auction_detail(auction_id):
         return redirect(url_for('browse_auctions'))
     
     # Check if auction has ended
-    auction['has_ended'] = datetime.now() > auction['end_time']
-    auction['time_remaining'] = auction['end_time'] - datetime.now()
+    auction['has_ended'] = g.now > auction['end_time']
+    auction['time_remaining'] = auction['end_time'] - g.now
     
     # Check if current user is winning
-    if current_user.is_authenticated and auction.get('bid_history'):
-        auction['user_is_winning'] = auction['bid_history'][0]['bidder_id'] == current_user.id
-    else:
-        auction['user_is_winning'] = False
+    auction['user_is_winning'] = current_user.is_authenticated and auction['top_bidder_id'] == current_user.id
     
-    return render_template('auction_detail.html', auction=auction)
+    # Bids and edits both bump updated_at; has_ended flips once when the auction closes
+    etag_parts = [auction_id, auction.get('updated_at'), auction['status'], auction['current_bid'],
+                  len(auction.get('bid_history') or []), auction['has_ended']]
+    return conditional_page(etag_parts, lambda: render_template('auction_detail.html', auction=auction))
 
 @app.route('/place_bid/<int:auction_id>', methods=['POST'])
 @login_required
@@ -639,6 +771,7 @@ def place_bid(auction_id):
     else:
         success, message = db_manager.place_bid(auction_id, current_user.id, bid_amount)
         if success:
+            invalidate_auction_cache()
             flash(message, 'success')
         else:
             flash(message, 'danger')
@@ -649,56 +782,36 @@ def place_bid(auction_id):
 @login_required
 def auction_history():
     """View user's auction history"""
-    # Get user's past auctions (as seller)
-    my_past_auctions = db_manager.get_user_auctions(current_user.id)
-    
-    
-    # Get user's bidding history
-    my_bid_history = db_manager.get_user_bids(current_user.id)
-
-    # Get won auctions
-    won_auctions = db_manager.get_won_auctions(current_user.id)
-
-        # Calculate total spent (float)
-    total_spent_raw = sum(
-        (auction.get('sold_price') or auction.get('current_bid') or 0)
-        for auction in won_auctions
-        if auction.get('payment_status') == 'paid'
-    )
-
-    # Convert to Decimal
-    total_spent = Decimal(str(total_spent_raw))
-
-    # Get total earned (as seller from paid auctions)
-    try:
-        total_earned = db_manager.get_total_earned(current_user.id)
-        total_earned = Decimal(str(total_earned))  # ensure Decimal
-    except Exception as e:
-        print(f"Error getting total earned: {e}")
-        total_earned = Decimal("0.00")
+    # Get user's past auctions (as seller), bidding history and won auctions
+    bundle = db_manager.get_history_bundle(current_user.id)
+    my_past_auctions = bundle['my_past_auctions']
+    my_bid_history = bundle['my_bid_history']
+    won_auctions = bundle['won_auctions']
 
+    # Totals spent (paid wins) and earned (as seller) are summed in SQL
     return render_template('auction_history.html',
                          my_past_auctions=my_past_auctions,
                          my_bid_history=my_bid_history,
                          won_auctions=won_auctions,
-                         total_spent=total_spent,
-                         total_earned=total_earned)
+                         total_spent=bundle['total_spent'],
+                         total_earned=bundle['total_earned'])
 
 @app.route('/api/notifications')
 @login_required
 def get_notifications():
-    """API endpoint to get user notifications"""
+    """API endpoint to get user notifications (?count_only=1 for just the badge count)"""
     limit = request.args.get('limit', 20, type=int)
 
-    # Get all notifications (read and unread) with limit
-    all_notifications = db_manager.get_user_notifications(current_user.id, unread_only=False, limit=limit)
+    # The badge poll only needs the (Redis-cached) unread count
+    if request.args.get('count_only', type=int):
+        return jsonify({'unread_count': db_manager.get_unread_notification_count(current_user.id)})
 
-    # Get count of unread notifications
-    unread_notifications = db_manager.get_user_notifications(current_user.id, unread_only=True)
+    # Latest notifications (read and unread) with the unread count in the same query
+    all_notifications, unread_count = db_manager.get_notifications_with_unread_count(current_user.id, limit)
 
     return jsonify({
         'count': len(all_notifications),
-        'unread_count': len(unread_notifications),
+        'unread_count': unread_count,
         'notifications': all_notifications
     })
 
@@ -709,29 +822,66 @@ def mark_notifications_read():
     success = db_manager.mark_notifications_read(current_user.id)
     return jsonify({'success': success})
 
-@app.route('/api/check_auction_status')
-def check_auction_status():
-    """API endpoint to check and update auction statuses"""
-    db_manager.close_expired_auctions()
-    return jsonify({'status': 'checked'})
+@app.route('/stream/notifications')
+@login_required
+def stream_notifications():
+    """Server-sent events telling the browser when new notifications arrive"""
+    if not (Config.SSE_ENABLED and redis_client):
+        # 204 tells EventSource not to reconnect; the page falls back to polling
+        return '', 204
+
+    user_id = current_user.id
+
+    def event_stream():
+        pubsub = redis_client.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(f"notifications:{user_id}", "notifications:broadcast")
+        try:
+            while True:
+                message = pubsub.get_message(timeout=15)
+                if message is None:
+                    yield ": keep-alive\n\n"
+                else:
+                    yield f"data: {message['data'].decode()}\n\n"
+        finally:
+            pubsub.close()
+
+    return Response(event_stream(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
 
 # Error handlers
+# Error pages take no per-request context, so each is rendered once and reused
+_error_pages = {}
+
+def error_page(status):
+    if status not in _error_pages:
+        _error_pages[status] = render_template(f'{status}.html')
+    return _error_pages[status], status
+
 @app.errorhandler(404)
 def not_found_error(error):
-    return render_template('404.html'), 404
+    return error_page(404)
+
+@app.errorhandler(413)
+def request_too_large(error):
+    # Werkzeug rejects bodies over MAX_CONTENT_LENGTH before the upload is read
+    if request.endpoint == 'create_auction':
+        flash(f'Image is too large. The maximum upload size is {Config.MAX_CONTENT_LENGTH // (1024 * 1024)}MB.', 'danger')
+        return redirect(url_for('create_auction'))
+    # Any other form: back to the (same-site) page it came from, else a bare 413
+    if request.referrer and request.referrer.startswith(request.host_url):
+        flash('The submitted data was too large.', 'danger')
+        return redirect(request.referrer)
+    return 'Request too large', 413
 
 @app.errorhandler(500)
 def internal_error(error):
-    return render_template('500.html'), 500
+    return error_page(500)
 
 
-@app.route('/debug/payment-check')
-@login_required
-def debug_payment_check():
-    """Debug endpoint to check payment data"""
-    conn = db_manager.get_connection()
+@cache.memoize(timeout=Config.PAYMENT_DEBUG_CACHE_TTL)
+def cached_payment_debug_info(user_id):
     debug_info = {
-        'current_user_id': current_user.id,
+        'current_user_id': user_id,
         'connection': 'Failed',
         'columns': [],
         'won_auctions_all': [],
@@ -739,77 +889,56 @@ def debug_payment_check():
         'error': None
     }
 
-    if conn:
+    result_sets = db_manager.get_payment_debug_bundle(user_id)
+    if result_sets:
         debug_info['connection'] = 'Success'
-        try:
-            cursor = conn.cursor(dictionary=True)
-
-            # Check table columns
-            cursor.execute("DESCRIBE auctions")
-            debug_info['columns'] = [col['Field'] for col in cursor.fetchall()]
-
-            # Get all won auctions
-            cursor.execute("""
-                SELECT auction_id, title, status, winner_id,
-                       payment_status, sold_price, current_bid, end_time
-                FROM auctions
-                WHERE winner_id = %s
-                ORDER BY end_time DESC
-            """, (current_user.id,))
-            debug_info['won_auctions_all'] = cursor.fetchall()
-
-            # Get pending payments using the same query as get_pending_payments
-            cursor.execute("""
-                SELECT a.auction_id, a.title, a.status,
-                       a.payment_status, a.sold_price, a.current_bid,
-                       COALESCE(a.sold_price, a.current_bid) as final_price
-                FROM auctions a
-                WHERE a.winner_id = %s
-                AND a.status IN ('completed', 'sold')
-                AND (a.payment_status IS NULL OR a.payment_status = 'pending')
-                ORDER BY a.end_time DESC
-            """, (current_user.id,))
-            debug_info['pending_payments'] = cursor.fetchall()
-
-        except Exception as e:
-            debug_info['error'] = str(e)
-        finally:
-            if conn.is_connected():
-                cursor.close()
-                conn.close()
+        debug_info['columns'] = db_manager.get_auction_columns()
+        debug_info['won_auctions_all'], debug_info['pending_payments'] = result_sets
+    else:
+        debug_info['error'] = 'Payment queries failed, see server log'
+    return debug_info
 
-    return jsonify(debug_info)
+@app.route('/debug/payment-check')
+@login_required
+def debug_payment_check():
+    """Debug endpoint to check payment data (only served in debug mode)"""
+    if not app.debug:
+        abort(404)
+    return jsonify(cached_payment_debug_info(current_user.id))
 
 # Template filters
+# (seconds per unit, singular, plural) from largest to smallest, shared by the
+# timeago and countdown filters that run on every listed auction
+_DURATION_UNITS = ((86400, 'day', 'days'), (3600, 'hour', 'hours'), (60, 'minute', 'minutes'))
+
+def format_duration(total_seconds, suffix):
+    """Format seconds as its largest whole unit, e.g. '3 hours left'; None under a minute"""
+    for unit_seconds, singular, plural in _DURATION_UNITS:
+        if total_seconds >= unit_seconds:
+            count = total_seconds // unit_seconds
+            return f"{count} {singular if count == 1 else plural} {suffix}"
+    return None
+
 @app.template_filter('timeago')
-def timeago_filter(dt):
+def timeago_filter(dt, now=None):
     """Convert datetime to time ago string"""
     if not dt:
         return ''
     
-    now = datetime.now()
+    now = now or getattr(g, 'now', None) or datetime.now()
     diff = now - dt
     
     if diff.days > 7:
         return dt.strftime('%B %d, %Y')
-    elif diff.days > 0:
-        return f"{diff.days} day{'s' if diff.days > 1 else ''} ago"
-    elif diff.seconds > 3600:
-        hours = diff.seconds // 3600
-        return f"{hours} hour{'s' if hours > 1 else ''} ago"
-    elif diff.seconds > 60:
-        minutes = diff.seconds // 60
-        return f"{minutes} minute{'s' if minutes > 1 else ''} ago"
-    else:
-        return "Just now"
+    return format_duration(int(diff.total_seconds()), 'ago') or "Just now"
 
 @app.template_filter('countdown')
-def countdown_filter(dt):
+def countdown_filter(dt, now=None):
     """Convert datetime or timedelta to countdown string"""
     if not dt:
         return ''
 
-    now = datetime.now()
+    now = now or getattr(g, 'now', None) or datetime.now()
 
     # ✅ Handle both datetime and timedelta safely
     if isinstance(dt, timedelta):
@@ -820,41 +949,63 @@ def countdown_filter(dt):
         return ''
 
     # ✅ Ensure we don't show negative countdowns
-    if diff.total_seconds() <= 0:
+    total_seconds = int(diff.total_seconds())
+    if total_seconds <= 0:
         return "Ended"
 
-    days = diff.days
-    hours, remainder = divmod(diff.seconds, 3600)
-    minutes, seconds = divmod(remainder, 60)
-
-    # ✅ Friendly formatting
-    if days > 0:
-        return f"{days} day{'s' if days > 1 else ''} left"
-    elif hours > 0:
-        return f"{hours} hour{'s' if hours > 1 else ''} left"
-    elif minutes > 0:
-        return f"{minutes} minute{'s' if minutes > 1 else ''} left"
-    else:
-        return f"{seconds} seconds left"
+    return format_duration(total_seconds, 'left') or f"{total_seconds} seconds left"
+
+# Bound once; called for every price cell on listing pages
+_format_currency = "${:,.2f}".format
 
 @app.template_filter('currency')
 def currency_filter(value):
     """Format value as currency"""
-    return f"${value:,.2f}" if value else "$0.00"
+    return _format_currency(value) if value else "$0.00"
+
+@app.template_filter('artwork_url')
+def artwork_url_filter(image_path, size=None):
+    """URL for an auction image (or one of its thumbnail sizes), or a placeholder while it is still processing"""
+    if not image_path:
+        return url_for('static', filename='images/processing.svg')
+    if image_path == ARTWORK_FAILED:
+        return url_for('static', filename='images/unavailable.svg')
+    # Decided by filename so rendering a page never touches the disk
+    if size and has_thumbnails(image_path):
+        return url_for('media', filename=thumbnail_name(image_path, size))
+    return url_for('media', filename=image_path)
+
+# Templates pass a handful of fixed patterns; compile each once
+_compile_pattern = lru_cache(maxsize=256)(re.compile)
 
 @app.template_filter('regex_search')
 def regex_search_filter(text, pattern):
     """Extract text using regex pattern"""
-    import re
-    match = re.search(pattern, text)
+    match = _compile_pattern(pattern).search(text)
     return match.group(1) if match else None
 
 # Background task to close expired auctions (run this periodically)
 def close_expired_auctions_task():
     """Task to close expired auctions - should be run periodically"""
+    # Every gunicorn worker runs the scheduler; only the first to claim the run sweeps
+    if not db_manager.claim_job('close_expired_auctions', Config.AUCTION_SWEEP_INTERVAL // 2):
+        return
     with app.app_context():
         db_manager.close_expired_auctions()
 
+# Run the expired-auction sweep and artwork recovery in-process instead of from
+# client requests (skipped in the debug reloader's parent process so they only start once)
+if ((Config.SCHEDULER_ENABLED or Config.ARTWORK_RECOVERY_ENABLED)
+        and (not app.debug or os.environ.get('WERKZEUG_RUN_MAIN') == 'true')):
+    scheduler = BackgroundScheduler(daemon=True)
+    if Config.SCHEDULER_ENABLED:
+        scheduler.add_job(close_expired_auctions_task, 'interval', seconds=Config.AUCTION_SWEEP_INTERVAL)
+    if Config.ARTWORK_RECOVERY_ENABLED:
+        # Also runs at startup, to pick up uploads the previous process left queued
+        scheduler.add_job(recover_artwork_uploads, 'interval', seconds=Config.ARTWORK_RECOVERY_INTERVAL,
+                          kwargs={'on_done': artwork_processed}, next_run_time=datetime.now())
+    scheduler.start()
+
 if __name__ == '__main__':
     # Create upload folder if it doesn't exist
     os.makedirs(Config.UPLOAD_FOLDER, exist_ok=True)
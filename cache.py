@@ -0,0 +1,11 @@
+from flask_caching import Cache
+from config import Config
+
+# Shared Redis connection, only created when REDIS_URL is configured
+redis_client = None
+if Config.REDIS_URL:
+    import redis
+    redis_client = redis.Redis.from_url(Config.REDIS_URL)
+
+# Application cache (Redis when configured, otherwise in-process)
+cache = Cache()
@@ -15,13 +15,73 @@ class Config:
     MYSQL_PASSWORD = os.environ.get('MYSQL_PASSWORD', '12345678')
     MYSQL_DATABASE = os.environ.get('MYSQL_DATABASE', 'art_auction_db')
     MYSQL_PORT = int(os.environ.get('MYSQL_PORT', 3306))
+    # Optional read replica for listings, browse stats and categories; unset uses the primary
+    MYSQL_READ_HOST = os.environ.get('MYSQL_READ_HOST')
+    MYSQL_READ_PORT = int(os.environ.get('MYSQL_READ_PORT', MYSQL_PORT))
+    # Seconds after an auction write during which those reads stay on the primary;
+    # keep it above the replica's usual lag
+    MYSQL_READ_AFTER_WRITE_WINDOW = int(os.environ.get('MYSQL_READ_AFTER_WRITE_WINDOW', 5))
+    MYSQL_POOL_NAME = 'art_auction'
+    MYSQL_POOL_SIZE = int(os.environ.get('MYSQL_POOL_SIZE', 25))  # mysql.connector allows at most 32
+    # Seconds a request waits for a free pooled connection before giving up
+    MYSQL_POOL_TIMEOUT = float(os.environ.get('MYSQL_POOL_TIMEOUT', 5))
+    # Reset session state when a connection goes back to the pool. Reads run with
+    # autocommit off, so skipping the reset would let a reused connection keep an
+    # old REPEATABLE READ snapshot; only disable it if every caller commits or rolls back
+    MYSQL_POOL_RESET_SESSION = os.environ.get('MYSQL_POOL_RESET_SESSION', 'True').lower() == 'true'
+    # Use the C extension for the wire protocol; set MYSQL_USE_PURE=true if it is not installed
+    # (gevent workers always use the pure-Python protocol so DB waits are cooperative)
+    MYSQL_USE_PURE = os.environ.get('MYSQL_USE_PURE', 'False').lower() == 'true'
+    # Compress the wire protocol; only worth the CPU when MySQL is on another network
+    MYSQL_COMPRESS = os.environ.get('MYSQL_COMPRESS', 'False').lower() == 'true'
 
     
     # File upload settings
     UPLOAD_FOLDER = 'static/uploads'
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max file size
     ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'webp'}
+    # Internal nginx location aliased to UPLOAD_FOLDER; when set, /media responses
+    # are handed to nginx via X-Accel-Redirect instead of being read by Flask
+    MEDIA_ACCEL_PREFIX = os.environ.get('MEDIA_ACCEL_PREFIX')  # e.g. '/internal-media/'
+    MEDIA_CACHE_MAX_AGE = 365 * 24 * 3600  # Artwork URLs are content-addressed
+    UPLOAD_STAGING_FOLDER = 'uploads_staging'  # Raw uploads waiting for background processing
+    IMAGE_WORKERS = int(os.environ.get('IMAGE_WORKERS', 2))
+    ARTWORK_RECOVERY_INTERVAL = 300  # Seconds between sweeps for uploads a restart dropped
+    ARTWORK_STALE_AFTER = 600  # Seconds before a queued upload counts as dropped
+    JPEGOPTIM_ENABLED = os.environ.get('JPEGOPTIM_ENABLED', 'False').lower() == 'true'  # Needs jpegoptim on PATH
+    ARTWORK_MAX_SIZE = 1200  # Longest edge of the full-size artwork image
+    THUMBNAIL_SIZES = (600, 300, 150)  # Card, list and table thumbnails, largest first
     
+    # Redis settings (optional - server-side sessions and caching are enabled when set)
+    REDIS_URL = os.environ.get('REDIS_URL')
+    USER_CACHE_TTL = 300  # Seconds a logged-in user's record stays cached
+    UNREAD_COUNT_TTL = 300  # Unread notification counters are recounted at least this often
+
+    # Cache settings
+    CACHE_TYPE = 'RedisCache' if REDIS_URL else 'SimpleCache'
+    CACHE_REDIS_URL = REDIS_URL
+    CACHE_DEFAULT_TIMEOUT = 60
+    CATEGORIES_CACHE_TTL = 3600
+    AUCTION_LIST_CACHE_TTL = 30
+    AUCTION_STATS_CACHE_TTL = 60
+    WALLET_BALANCE_CACHE_TTL = 30  # Navbar balance; wallet writes invalidate it immediately
+    PAYMENT_DEBUG_CACHE_TTL = 10
+
+    # Response compression (Flask-Compress); HTML/JSON over 1KB, brotli preferred
+    COMPRESS_ALGORITHM = ['br', 'gzip']
+    COMPRESS_LEVEL = 4  # gzip
+    COMPRESS_BR_LEVEL = 4
+    COMPRESS_MIN_SIZE = 1024
+
+    # Background jobs
+    SCHEDULER_ENABLED = os.environ.get('SCHEDULER_ENABLED', 'True').lower() == 'true'  # Expired-auction sweep
+    # Re-queue dropped uploads and mark failed ones; independent of SCHEDULER_ENABLED
+    ARTWORK_RECOVERY_ENABLED = os.environ.get('ARTWORK_RECOVERY_ENABLED', 'True').lower() == 'true'
+    AUCTION_SWEEP_INTERVAL = 30  # Seconds between expired-auction sweeps
+
+    # Server-sent notification stream (needs REDIS_URL and an async worker, e.g. gunicorn -k gevent)
+    SSE_ENABLED = os.environ.get('SSE_ENABLED', 'False').lower() == 'true'
+
     # Session settings
     PERMANENT_SESSION_LIFETIME = timedelta(hours=24)
     SESSION_COOKIE_SECURE = False  # Set to True in production with HTTPS
@@ -44,3 +104,4 @@ class Config:
     def init_app(app):
         """Initialize application with configuration"""
         os.makedirs(Config.UPLOAD_FOLDER, exist_ok=True)
+        os.makedirs(Config.UPLOAD_STAGING_FOLDER, exist_ok=True)
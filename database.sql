@@ -10,6 +10,7 @@ CREATE TABLE IF NOT EXISTS users (
     email VARCHAR(100) UNIQUE NOT NULL,
     password_hash VARCHAR(255) NOT NULL,
     wallet_balance DECIMAL(10, 2) DEFAULT 0.00,
+    total_earned DECIMAL(12, 2) NOT NULL DEFAULT 0.00,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     INDEX idx_username (username),
     INDEX idx_email (email)
@@ -36,16 +37,25 @@ CREATE TABLE IF NOT EXISTS auctions (
     category_id INT,
     starting_bid DECIMAL(10, 2) NOT NULL,
     current_bid DECIMAL(10, 2),
+    bid_count INT NOT NULL DEFAULT 0,
+    top_bidder_id INT DEFAULT NULL,
     start_time DATETIME DEFAULT CURRENT_TIMESTAMP,
     end_time DATETIME NOT NULL,
     status ENUM('active', 'completed', 'cancelled') DEFAULT 'active',
     winner_id INT DEFAULT NULL,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
     FOREIGN KEY (seller_id) REFERENCES users(user_id) ON DELETE CASCADE,
     FOREIGN KEY (category_id) REFERENCES categories(category_id),
     FOREIGN KEY (winner_id) REFERENCES users(user_id) ON DELETE SET NULL,
-    INDEX idx_status (status),
-    INDEX idx_end_time (end_time)
+    -- One index per browse path; current_bid and bid_count are each in one index,
+    -- since place_bid rewrites both on every bid
+    INDEX idx_active (status, end_time),
+    INDEX idx_status_created (status, created_at),
+    INDEX idx_status_price (status, current_bid),
+    INDEX idx_status_bids (status, bid_count),
+    INDEX idx_category_end (status, category_id, end_time),
+    FULLTEXT KEY ft_title_desc (title, description)
 );
 
 -- Bids table
@@ -57,7 +67,7 @@ CREATE TABLE IF NOT EXISTS bids (
     bid_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     FOREIGN KEY (auction_id) REFERENCES auctions(auction_id) ON DELETE CASCADE,
     FOREIGN KEY (bidder_id) REFERENCES users(user_id) ON DELETE CASCADE,
-    INDEX idx_auction (auction_id),
+    INDEX idx_auction_time (auction_id, bid_time),
     INDEX idx_bidder (bidder_id)
 );
 
@@ -70,7 +80,8 @@ CREATE TABLE IF NOT EXISTS notifications (
     is_read BOOLEAN DEFAULT FALSE,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     FOREIGN KEY (user_id) REFERENCES users(user_id) ON DELETE CASCADE,
-    INDEX idx_user_read (user_id, is_read)
+    INDEX idx_user_read (user_id, is_read),
+    INDEX idx_user_created (user_id, created_at)
 );
 
 -- Watchlist table (for users to follow auctions)
@@ -90,14 +101,11 @@ SELECT
     a.*, 
     u.username as seller_name,
     c.category_name,
-    COUNT(DISTINCT b.bidder_id) as bid_count,
-    MAX(b.bid_amount) as highest_bid
+    a.current_bid as highest_bid
 FROM auctions a
 LEFT JOIN users u ON a.seller_id = u.user_id
 LEFT JOIN categories c ON a.category_id = c.category_id
-LEFT JOIN bids b ON a.auction_id = b.auction_id
-WHERE a.status = 'active' AND a.end_time > NOW()
-GROUP BY a.auction_id;
+WHERE a.status = 'active' AND a.end_time > NOW();
 
 -- Wallet transactions table
 CREATE TABLE IF NOT EXISTS wallet_transactions (
@@ -113,5 +121,16 @@ CREATE TABLE IF NOT EXISTS wallet_transactions (
     INDEX idx_user_transactions (user_id, created_at DESC)
 );
 
+-- Last run of periodic jobs, so only one worker process runs each sweep
+CREATE TABLE IF NOT EXISTS system_jobs (
+    name VARCHAR(50) PRIMARY KEY,
+    last_run DATETIME NOT NULL DEFAULT '1970-01-01 00:00:00'
+);
+
+INSERT IGNORE INTO system_jobs (name) VALUES ('close_expired_auctions');
+
 ALTER TABLE auctions ADD COLUMN sold_price DECIMAL(10,2) NULL AFTER current_bid;
-ALTER TABLE auctions ADD COLUMN payment_status ENUM('pending', 'paid') DEFAULT 'pending' AFTER sold_price;
\ No newline at end of file
+ALTER TABLE auctions ADD COLUMN payment_status ENUM('pending', 'paid') DEFAULT 'pending' AFTER sold_price;
+
+-- Index for the won-auction and payment lists
+ALTER TABLE auctions ADD KEY idx_winner_payment (winner_id, status, payment_status, end_time);
\ No newline at end of file
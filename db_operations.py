@@ -1,84 +1,342 @@
 import mysql.connector
-from mysql.connector import Error
-from werkzeug.security import generate_password_hash, check_password_hash
+from mysql.connector import Error, PoolError, pooling
+from werkzeug.security import check_password_hash
+from argon2 import PasswordHasher
+from argon2.exceptions import VerificationError, InvalidHashError
 from datetime import datetime, timedelta
+from decimal import Decimal
 import os
+import json
+import threading
+import time
+from contextlib import contextmanager
 from config import Config
+from cache import redis_client
+
+# Money columns are DECIMAL, which the driver already returns as Decimal
+_ZERO = Decimal('0.00')
+
+# Argon2id for new passwords; legacy werkzeug pbkdf2 hashes are upgraded on login
+_password_hasher = PasswordHasher(time_cost=2, memory_cost=64 * 1024, parallelism=2)
+
+# Queries shared by the batched page bundles.
+# They list only the columns the dashboard/history/payment templates render;
+# descriptions are cut to one character past what the templates show so their
+# "..." checks still work.
+_SQL_USER_BIDS = """SELECT b.bid_id, b.auction_id, b.bid_amount, b.bid_time,
+                      a.title, a.image_path, a.end_time, a.status,
+                      a.current_bid as current_highest_bid,
+                      CASE WHEN a.current_bid = b.bid_amount THEN 1 ELSE 0 END as is_winning
+                      FROM bids b
+                      JOIN auctions a ON b.auction_id = a.auction_id
+                      WHERE b.bidder_id = %s
+                      ORDER BY b.bid_time DESC"""
+
+_SQL_USER_AUCTIONS = """SELECT a.auction_id, a.title, a.image_path, a.status, a.starting_bid,
+                      a.end_time, a.created_at, a.bid_count, a.payment_status, c.category_name,
+                      COALESCE(a.current_bid, a.starting_bid) as final_bid,
+                      w.username as winner_name
+                      FROM auctions a
+                      LEFT JOIN categories c ON a.category_id = c.category_id
+                      LEFT JOIN users w ON a.winner_id = w.user_id
+                      WHERE a.seller_id = %s
+                      ORDER BY a.created_at DESC"""
+
+_SQL_WON_AUCTIONS = """SELECT a.auction_id, a.title, a.image_path, a.status, a.end_time,
+                      a.payment_status, u.username as seller_name, c.category_name,
+                      COALESCE(a.sold_price, a.current_bid) as final_price
+                      FROM auctions a
+                      JOIN users u ON a.seller_id = u.user_id
+                      LEFT JOIN categories c ON a.category_id = c.category_id
+                      WHERE a.winner_id = %s AND a.status IN ('completed', 'sold')
+                      ORDER BY a.end_time DESC"""
+
+_SQL_USER_NOTIFICATIONS = """SELECT * FROM notifications WHERE user_id = %s
+                      ORDER BY created_at DESC LIMIT %s"""
+
+# Unread total rides along on every row so the API needs one round-trip
+_SQL_NOTIFICATIONS_WITH_UNREAD = """SELECT n.*,
+                      (SELECT COUNT(*) FROM notifications
+                       WHERE user_id = %s AND is_read = FALSE) as unread_count
+                      FROM notifications n WHERE n.user_id = %s
+                      ORDER BY n.created_at DESC LIMIT %s"""
+
+_SQL_PENDING_PAYMENTS = """SELECT a.auction_id, a.title, LEFT(a.description, 101) as description,
+                      a.image_path, a.status, a.end_time, a.payment_status,
+                      u.username as seller_name, c.category_name,
+                      COALESCE(a.sold_price, a.current_bid) as final_price
+                      FROM auctions a
+                      JOIN users u ON a.seller_id = u.user_id
+                      LEFT JOIN categories c ON a.category_id = c.category_id
+                      WHERE a.winner_id = %s
+                      AND a.status IN ('completed', 'sold')
+                      AND (a.payment_status IS NULL OR a.payment_status = 'pending')
+                      ORDER BY a.end_time DESC"""
+
+_SQL_COMPLETED_PAYMENTS = """SELECT a.auction_id, a.title, LEFT(a.description, 101) as description,
+                      a.image_path, a.status, a.end_time, a.payment_status,
+                      u.username as seller_name, c.category_name,
+                      COALESCE(a.sold_price, a.current_bid) as final_price
+                      FROM auctions a
+                      JOIN users u ON a.seller_id = u.user_id
+                      LEFT JOIN categories c ON a.category_id = c.category_id
+                      WHERE a.winner_id = %s
+                      AND a.status IN ('completed', 'sold')
+                      AND a.payment_status = 'paid'
+                      ORDER BY a.end_time DESC
+                      LIMIT %s"""
+
+# Display-only money totals, summed by MySQL instead of in Python
+_SQL_USER_TOTALS = """SELECT
+                      (SELECT COALESCE(SUM(COALESCE(a.sold_price, a.current_bid)), 0)
+                       FROM auctions a
+                       WHERE a.winner_id = %s AND a.status IN ('completed', 'sold')
+                       AND a.payment_status = 'paid') as total_spent,
+                      (SELECT total_earned FROM users WHERE user_id = %s) as total_earned"""
+
+_SQL_INSERT_NOTIFICATION = """INSERT INTO notifications (user_id, message, type)
+                      VALUES (%s, %s, %s)"""
+
+# Increment a cached unread counter only if it is populated, so a missing key
+# still falls back to a COUNT(*) instead of starting from zero
+_INCR_IF_EXISTS = "if redis.call('EXISTS', KEYS[1]) == 1 then return redis.call('INCR', KEYS[1]) end"
+
+# Only touches unread rows (idx_user_read), so it is cheap when there is nothing to mark
+_SQL_MARK_NOTIFICATIONS_READ = """UPDATE notifications SET is_read = TRUE
+                      WHERE user_id = %s AND is_read = FALSE"""
+
+# Columns and directions get_active_auctions may interpolate into ORDER BY
+_LISTING_SORT_COLUMNS = frozenset({'end_time', 'created_at', 'current_bid', 'bid_count'})
+_LISTING_SORT_ORDERS = frozenset({'ASC', 'DESC'})
+
+def _green_sockets():
+    """True when gevent has patched the socket module (gunicorn -k gevent)
+
+    The C extension does its own blocking I/O, so under gevent the pure-Python
+    protocol is used instead: its socket waits yield to other requests.
+    """
+    try:
+        from gevent import monkey
+    except ImportError:
+        return False
+    return monkey.is_module_patched('socket')
+
 
 class DatabaseManager:
     """Handles all database operations for the art auction website"""
     
     def __init__(self):
+        if not 1 <= Config.MYSQL_POOL_SIZE <= pooling.CNX_POOL_MAXSIZE:
+            raise ValueError(f"MYSQL_POOL_SIZE must be between 1 and {pooling.CNX_POOL_MAXSIZE}, "
+                             f"got {Config.MYSQL_POOL_SIZE}")
         self.config = {
             'host': Config.MYSQL_HOST,
             'user': Config.MYSQL_USER,
             'password': Config.MYSQL_PASSWORD,
             'database': Config.MYSQL_DATABASE,
             'port': Config.MYSQL_PORT,
-            'autocommit': False
+            'autocommit': False,
+            'compress': Config.MYSQL_COMPRESS
         }
+        self.pool = None
+        self.read_pool = None
+        self._primary_reads_until = 0.0
+        self._pool_lock = threading.Lock()
+        self._auction_columns = None
     
     def get_connection(self):
-        """Create and return a database connection"""
+        """Return a pooled database connection (close() hands it back to the pool)"""
         try:
-            return mysql.connector.connect(**self.config)
+            if self.pool is None:
+                # Created on first use so each gunicorn worker builds its own pool
+                with self._pool_lock:
+                    if self.pool is None:
+                        self.pool = self._create_pool(Config.MYSQL_POOL_NAME)
+            # The pool pings each connection as it is handed out (is_connected())
+            # and reconnects it if the server dropped it while idle
+            return self._checkout(self.pool)
         except Error as e:
             print(f"Error connecting to MySQL: {e}")
             return None
+
+    def get_read_connection(self):
+        """Return a pooled connection to the read replica, for reads that can lag
+
+        Falls back to the primary when MYSQL_READ_HOST is unset or the replica
+        cannot hand out a connection.
+        """
+        if not Config.MYSQL_READ_HOST or self._recently_written():
+            return self.get_connection()
+        try:
+            if self.read_pool is None:
+                with self._pool_lock:
+                    if self.read_pool is None:
+                        self.read_pool = self._create_pool(f"{Config.MYSQL_POOL_NAME}_read",
+                                                           host=Config.MYSQL_READ_HOST,
+                                                           port=Config.MYSQL_READ_PORT)
+            return self._checkout(self.read_pool)
+        except Error as e:
+            print(f"Error connecting to MySQL read replica: {e}")
+            return self.get_connection()
+
+    def _checkout(self, pool):
+        """Take a connection from pool, waiting up to MYSQL_POOL_TIMEOUT seconds if it is exhausted
+
+        mysql.connector raises PoolError at once when every connection is in use;
+        sleeping yields to other greenlets under gevent, so one can be returned.
+        """
+        deadline = time.monotonic() + Config.MYSQL_POOL_TIMEOUT
+        while True:
+            try:
+                return pool.get_connection()
+            except PoolError:
+                if time.monotonic() >= deadline:
+                    raise
+                time.sleep(0.01)
+
+    def mark_recent_write(self):
+        """Keep replica reads on the primary for MYSQL_READ_AFTER_WRITE_WINDOW seconds
+
+        Call it when cached listings are dropped after a write, so the refill
+        cannot re-cache rows from a replica that has not caught up yet.
+        """
+        if not Config.MYSQL_READ_HOST:
+            return
+        window = Config.MYSQL_READ_AFTER_WRITE_WINDOW
+        self._primary_reads_until = time.monotonic() + window
+        if redis_client:
+            # Shared so other workers' cache refills also go to the primary
+            try:
+                redis_client.set('db:recent_write', 1, ex=window)
+            except Exception as e:
+                print(f"Error flagging recent write: {e}")
+
+    def _recently_written(self):
+        """True while a write may not have reached the read replica yet"""
+        if time.monotonic() < self._primary_reads_until:
+            return True
+        if redis_client:
+            try:
+                return bool(redis_client.exists('db:recent_write'))
+            except Exception as e:
+                print(f"Error checking recent write: {e}")
+                return True
+        return False
+
+    def _create_pool(self, pool_name, **overrides):
+        """Build a connection pool from self.config, e.g. with another host"""
+        return pooling.MySQLConnectionPool(
+            pool_name=pool_name,
+            pool_size=Config.MYSQL_POOL_SIZE,
+            pool_reset_session=Config.MYSQL_POOL_RESET_SESSION,
+            use_pure=Config.MYSQL_USE_PURE or _green_sockets(),
+            **dict(self.config, **overrides)
+        )
+    
+    @contextmanager
+    def _cursor(self, conn, dictionary=False):
+        """Yield a cursor on a pooled connection, closing both afterwards
+
+        close() on a pooled connection only hands it back, so there is no
+        is_connected() check (a COM_PING round-trip) before releasing it.
+        """
+        try:
+            cursor = conn.cursor(dictionary=dictionary)
+            try:
+                yield cursor
+            finally:
+                cursor.close()
+        finally:
+            conn.close()
     
     # User Management Functions
     def create_user(self, username, email, password):
         """Create a new user account"""
+        # Hash before taking a pooled connection; argon2 is the slow part
+        password_hash = _password_hasher.hash(password)
+
         conn = self.get_connection()
         if not conn:
             return False, "Database connection failed"
         
-        try:
-            cursor = conn.cursor()
-            password_hash = generate_password_hash(password)
-            
-            query = """INSERT INTO users (username, email, password_hash) 
-                      VALUES (%s, %s, %s)"""
-            cursor.execute(query, (username, email, password_hash))
-            conn.commit()
-            return True, "User created successfully"
+        with self._cursor(conn) as cursor:
+            try:
+                query = """INSERT INTO users (username, email, password_hash) 
+                          VALUES (%s, %s, %s)"""
+                cursor.execute(query, (username, email, password_hash))
+                conn.commit()
+                return True, "User created successfully"
         
-        except mysql.connector.IntegrityError as e:
-            if "username" in str(e):
-                return False, "Username already exists"
-            elif "email" in str(e):
-                return False, "Email already registered"
-            return False, str(e)
-        except Error as e:
-            return False, str(e)
-        finally:
-            if conn.is_connected():
-                cursor.close()
-                conn.close()
+            except mysql.connector.IntegrityError as e:
+                if "username" in str(e):
+                    return False, "Username already exists"
+                elif "email" in str(e):
+                    return False, "Email already registered"
+                return False, str(e)
+            except Error as e:
+                return False, str(e)
     
     def verify_user(self, username, password):
         """Verify user credentials for login"""
+        user = self._get_login_user(username)
+        if not user:
+            return None
+
+        # The connection is already back in the pool while argon2 runs
+        stored_hash = user['password_hash']
+        if stored_hash.startswith('$argon2'):
+            try:
+                _password_hasher.verify(stored_hash, password)
+            except (VerificationError, InvalidHashError):
+                return None
+            needs_rehash = _password_hasher.check_needs_rehash(stored_hash)
+        elif check_password_hash(stored_hash, password):
+            needs_rehash = True
+        else:
+            return None
+
+        if needs_rehash:
+            self.update_password_hash(user['user_id'], _password_hasher.hash(password))
+        return user
+
+    def _get_login_user(self, login):
+        """Look up a user by username or email for login"""
         conn = self.get_connection()
         if not conn:
             return None
         
-        try:
-            cursor = conn.cursor(dictionary=True)
-            query = "SELECT * FROM users WHERE username = %s OR email = %s"
-            cursor.execute(query, (username, username))
-            user = cursor.fetchone()
-            
-            if user and check_password_hash(user['password_hash'], password):
-                return user
-            return None
+        with self._cursor(conn, dictionary=True) as cursor:
+            try:
+                # One equality lookup per unique index instead of an OR across both
+                query = """(SELECT user_id, username, email, created_at, password_hash
+                            FROM users WHERE username = %s)
+                           UNION ALL
+                           (SELECT user_id, username, email, created_at, password_hash
+                            FROM users WHERE email = %s)
+                           LIMIT 1"""
+                cursor.execute(query, (login, login))
+                return cursor.fetchone()
         
-        except Error as e:
-            print(f"Error verifying user: {e}")
-            return None
-        finally:
-            if conn.is_connected():
-                cursor.close()
-                conn.close()
+            except Error as e:
+                print(f"Error verifying user: {e}")
+                return None
+
+    def update_password_hash(self, user_id, password_hash):
+        """Store a new password hash for a user"""
+        conn = self.get_connection()
+        if not conn:
+            return False
+
+        with self._cursor(conn) as cursor:
+            try:
+                cursor.execute("UPDATE users SET password_hash = %s WHERE user_id = %s",
+                             (password_hash, user_id))
+                conn.commit()
+                return True
+
+            except Error as e:
+                print(f"Error updating password hash: {e}")
+                return False
     
     def get_user_by_id(self, user_id):
         """Get user information by ID"""
@@ -86,19 +344,15 @@ class DatabaseManager:
         if not conn:
             return None
         
-        try:
-            cursor = conn.cursor(dictionary=True)
-            query = "SELECT user_id, username, email, created_at FROM users WHERE user_id = %s"
-            cursor.execute(query, (user_id,))
-            return cursor.fetchone()
+        with self._cursor(conn, dictionary=True) as cursor:
+            try:
+                query = "SELECT user_id, username, email, created_at FROM users WHERE user_id = %s"
+                cursor.execute(query, (user_id,))
+                return cursor.fetchone()
         
-        except Error as e:
-            print(f"Error getting user: {e}")
-            return None
-        finally:
-            if conn.is_connected():
-                cursor.close()
-                conn.close()
+            except Error as e:
+                print(f"Error getting user: {e}")
+                return None
     
     # Auction Management Functions
     def create_auction(self, seller_id, title, description, image_path, category_id, 
@@ -108,130 +362,165 @@ class DatabaseManager:
         if not conn:
             return False, "Database connection failed"
         
-        try:
-            cursor = conn.cursor()
-            end_time = datetime.now() + timedelta(days=duration_days)
+        with self._cursor(conn) as cursor:
+            try:
+                end_time = datetime.now() + timedelta(days=duration_days)
             
-            query = """INSERT INTO auctions 
-                      (seller_id, title, description, image_path, category_id, 
-                       starting_bid, current_bid, end_time) 
-                      VALUES (%s, %s, %s, %s, %s, %s, %s, %s)"""
+                query = """INSERT INTO auctions 
+                          (seller_id, title, description, image_path, category_id, 
+                           starting_bid, current_bid, end_time) 
+                          VALUES (%s, %s, %s, %s, %s, %s, %s, %s)"""
             
-            cursor.execute(query, (seller_id, title, description, image_path, 
-                                  category_id, starting_bid, starting_bid, end_time))
-            conn.commit()
+                cursor.execute(query, (seller_id, title, description, image_path, 
+                                      category_id, starting_bid, starting_bid, end_time))
+                conn.commit()
             
-            # Create notification for new auction
-            self.create_notification_for_new_auction(cursor.lastrowid, title)
+                # Create notification for new auction
+                self.create_notification_for_new_auction(cursor.lastrowid, title)
             
-            return True, cursor.lastrowid
+                return True, cursor.lastrowid
         
-        except Error as e:
-            conn.rollback()
-            return False, str(e)
-        finally:
-            if conn.is_connected():
-                cursor.close()
-                conn.close()
+            except Error as e:
+                conn.rollback()
+                return False, str(e)
     
-    def get_active_auctions(self, category_id=None, min_price=None, max_price=None,
-                        search_term=None, limit=20, offset=0,
-                        sort_by="end_time", order="ASC", random_order=False):
-        """Get list of active auctions with filters"""
+    def update_auction_image(self, auction_id, image_path):
+        """Attach a processed artwork image to an auction"""
+        conn = self.get_connection()
+        if not conn:
+            return False
+
+        with self._cursor(conn) as cursor:
+            try:
+                cursor.execute("UPDATE auctions SET image_path = %s WHERE auction_id = %s",
+                             (image_path, auction_id))
+                conn.commit()
+                return True
+
+            except Error as e:
+                print(f"Error updating auction image: {e}")
+                conn.rollback()
+                return False
+
+    def get_auctions_without_image(self, older_than):
+        """Ids of auctions created over older_than seconds ago whose image never arrived"""
         conn = self.get_connection()
         if not conn:
             return []
 
-        try:
-            cursor = conn.cursor(dictionary=True)
+        with self._cursor(conn) as cursor:
+            try:
+                cursor.execute("""SELECT auction_id FROM auctions
+                                WHERE image_path IS NULL
+                                AND created_at < NOW() - INTERVAL %s SECOND""", (older_than,))
+                return [row[0] for row in cursor.fetchall()]
 
-            query = """SELECT a.*, u.username as seller_name, c.category_name,
-                      COUNT(DISTINCT b.bidder_id) as bid_count,
-                      COALESCE(MAX(b.bid_amount), a.starting_bid) as current_bid
-                      FROM auctions a
-                      LEFT JOIN users u ON a.seller_id = u.user_id
-                      LEFT JOIN categories c ON a.category_id = c.category_id
-                      LEFT JOIN bids b ON a.auction_id = b.auction_id
-                      WHERE a.status = 'active' AND a.end_time > NOW()"""
-
-            params = []
-
-            if category_id:
-                query += " AND a.category_id = %s"
-                params.append(category_id)
-
-            if min_price:
-                query += " AND COALESCE(a.current_bid, a.starting_bid) >= %s"
-                params.append(min_price)
-
-            if max_price:
-                query += " AND COALESCE(a.current_bid, a.starting_bid) <= %s"
-                params.append(max_price)
-
-            if search_term:
-                query += " AND (a.title LIKE %s OR a.description LIKE %s)"
-                search_pattern = f"%{search_term}%"
-                params.extend([search_pattern, search_pattern])
-
-            # Add ORDER BY clause
-            if random_order:
-                query += " GROUP BY a.auction_id ORDER BY RAND() LIMIT %s OFFSET %s"
-            else:
-                query += f" GROUP BY a.auction_id ORDER BY {sort_by} {order} LIMIT %s OFFSET %s"
-            params.extend([limit, offset])
+            except Error as e:
+                print(f"Error getting auctions without image: {e}")
+                return []
+
+    def get_active_auctions(self, category_id=None, min_price=None, max_price=None,
+                        search_term=None, limit=20,
+                        sort_by="end_time", order="ASC", random_order=False,
+                        after_value=None, after_id=None):
+        """Get list of active auctions with filters
+
+        Passing after_value/after_id (the sort value and id of the last row already
+        shown) returns the next page by keyset; sort_by must be an auction column.
+        """
+        if sort_by not in _LISTING_SORT_COLUMNS or order not in _LISTING_SORT_ORDERS:
+            raise ValueError(f"Unsupported auction sort: {sort_by} {order}")
+
+        conn = self.get_read_connection()
+        if not conn:
+            return []
+
+        with self._cursor(conn, dictionary=True) as cursor:
+            try:
+                # bid_count and current_bid are kept on the auction row by place_bid,
+                # so listing never has to join or aggregate the bids table
+                # Only the columns the listing cards use (descriptions cut to the
+                # 200 characters the home page shows, plus one for its "..." check)
+                query = """SELECT a.auction_id, a.title, LEFT(a.description, 201) as description,
+                          a.image_path, a.category_id, a.end_time, a.created_at, a.updated_at,
+                          a.bid_count, u.username as seller_name, c.category_name,
+                          COALESCE(a.current_bid, a.starting_bid) as current_bid
+                          FROM auctions a
+                          LEFT JOIN users u ON a.seller_id = u.user_id
+                          LEFT JOIN categories c ON a.category_id = c.category_id
+                          WHERE a.status = 'active' AND a.end_time > NOW()"""
+
+                params = []
+
+                if category_id:
+                    query += " AND a.category_id = %s"
+                    params.append(category_id)
+
+                # current_bid starts at starting_bid, so the bare column is compared
+                # (sargable on idx_status_price instead of a COALESCE per row)
+                if min_price:
+                    query += " AND a.current_bid >= %s"
+                    params.append(min_price)
+
+                if max_price:
+                    query += " AND a.current_bid <= %s"
+                    params.append(max_price)
+
+                if search_term:
+                    # FULLTEXT ignores words shorter than innodb_ft_min_token_size (3)
+                    if len(search_term) >= 3:
+                        query += " AND MATCH(a.title, a.description) AGAINST (%s IN NATURAL LANGUAGE MODE)"
+                        params.append(search_term)
+                    else:
+                        query += " AND (a.title LIKE %s OR a.description LIKE %s)"
+                        search_pattern = f"%{search_term}%"
+                        params.extend([search_pattern, search_pattern])
+
+                if after_value is not None and after_id is not None:
+                    # Seek past the last row shown, e.g. (end_time, auction_id) > (%s, %s)
+                    comparison = '<' if order == 'DESC' else '>'
+                    query += f" AND (a.{sort_by}, a.auction_id) {comparison} (%s, %s)"
+                    params.extend([after_value, after_id])
+
+                # Add ORDER BY clause
+                if random_order:
+                    query += " ORDER BY RAND() LIMIT %s"
+                else:
+                    # auction_id breaks ties so keyset cursors are unambiguous; the bare
+                    # column (not the COALESCE alias) lets the (status, <sort>) indexes order rows
+                    query += f" ORDER BY a.{sort_by} {order}, a.auction_id {order} LIMIT %s"
+                params.append(limit)
   
-            cursor.execute(query, params)
-            return cursor.fetchall()
+                cursor.execute(query, params)
+                return cursor.fetchall()
         
-        except Error as e:
-            print(f"Error getting auctions: {e}")
-            return []
-        finally:
-            if conn.is_connected():
-                cursor.close()
-                conn.close()
+            except Error as e:
+                print(f"Error getting auctions: {e}")
+                return []
     
     def get_auction_by_id(self, auction_id):
-        """Get detailed information about a specific auction"""
-        conn = self.get_connection()
-        if not conn:
-            return None
-        
-        try:
-            cursor = conn.cursor(dictionary=True)
-            
-            query = """SELECT a.*, u.username as seller_name, c.category_name,
-                      COUNT(DISTINCT b.bidder_id) as bid_count,
-                      COALESCE(MAX(b.bid_amount), a.starting_bid) as current_bid
+        """Get detailed information about a specific auction and its bid history in one round-trip"""
+        result_sets = self._fetch_result_sets([
+            ("""SELECT a.*, u.username as seller_name, c.category_name,
+                      COALESCE(a.sold_price, a.current_bid) as final_price,
+                      COALESCE(a.current_bid, a.starting_bid) as current_bid
                       FROM auctions a
                       LEFT JOIN users u ON a.seller_id = u.user_id
                       LEFT JOIN categories c ON a.category_id = c.category_id
-                      LEFT JOIN bids b ON a.auction_id = b.auction_id
-                      WHERE a.auction_id = %s
-                      GROUP BY a.auction_id"""
-            
-            cursor.execute(query, (auction_id,))
-            auction = cursor.fetchone()
-            
-            if auction:
-                # Get bid history
-                cursor.execute("""SELECT b.*, u.username as bidder_name 
-                                FROM bids b
-                                JOIN users u ON b.bidder_id = u.user_id
-                                WHERE b.auction_id = %s
-                                ORDER BY b.bid_time DESC
-                                LIMIT 10""", (auction_id,))
-                auction['bid_history'] = cursor.fetchall()
-            
-            return auction
-        
-        except Error as e:
-            print(f"Error getting auction: {e}")
+                      WHERE a.auction_id = %s""", (auction_id,)),
+            ("""SELECT b.bid_id, b.bidder_id, b.bid_amount, b.bid_time, u.username as bidder_name
+                      FROM bids b
+                      JOIN users u ON b.bidder_id = u.user_id
+                      WHERE b.auction_id = %s
+                      ORDER BY b.bid_time DESC
+                      LIMIT 10""", (auction_id,)),
+        ])
+        if not result_sets or not result_sets[0]:
             return None
-        finally:
-            if conn.is_connected():
-                cursor.close()
-                conn.close()
+
+        auction = result_sets[0][0]
+        auction['bid_history'] = result_sets[1]
+        return auction
     
     # Bidding Functions
     def place_bid(self, auction_id, bidder_id, bid_amount):
@@ -240,250 +529,295 @@ class DatabaseManager:
         if not conn:
             return False, "Database connection failed"
         
-        try:
-            cursor = conn.cursor(dictionary=True)
-            
-            # Check if auction is still active
-            cursor.execute("""SELECT * FROM auctions 
-                            WHERE auction_id = %s AND status = 'active' 
-                            AND end_time > NOW()""", (auction_id,))
-            auction = cursor.fetchone()
+        with self._cursor(conn, dictionary=True) as cursor:
+            try:
+                # Check if auction is still active (locked so concurrent bids update the
+                # denormalized bid columns one at a time). has_bid tells whether this is
+                # the bidder's first bid, since bid_count counts distinct bidders.
+                cursor.execute("""SELECT a.seller_id, a.title, a.current_bid, a.starting_bid,
+                                a.top_bidder_id,
+                                EXISTS(SELECT 1 FROM bids b
+                                       WHERE b.auction_id = a.auction_id AND b.bidder_id = %s) as has_bid
+                                FROM auctions a
+                                WHERE a.auction_id = %s AND a.status = 'active'
+                                AND a.end_time > NOW()
+                                FOR UPDATE""", (bidder_id, auction_id))
+                auction = cursor.fetchone()
             
-            if not auction:
-                return False, "Auction is not active or has ended"
+                if not auction:
+                    conn.rollback()
+                    return False, "Auction is not active or has ended"
             
-            # Check if bidder is not the seller
-            if auction['seller_id'] == bidder_id:
-                return False, "You cannot bid on your own auction"
+                # Check if bidder is not the seller
+                if auction['seller_id'] == bidder_id:
+                    conn.rollback()
+                    return False, "You cannot bid on your own auction"
             
-            # Get current highest bid
-            current_bid = auction['current_bid'] or auction['starting_bid']
+                # Get current highest bid
+                current_bid = auction['current_bid'] or auction['starting_bid']
             
-            # Check if bid is high enough
-            min_bid = current_bid + Config.MINIMUM_BID_INCREMENT
-            if bid_amount < min_bid:
-                return False, f"Bid must be at least ${min_bid:.2f}"
+                # Check if bid is high enough
+                min_bid = current_bid + Config.MINIMUM_BID_INCREMENT
+                if bid_amount < min_bid:
+                    conn.rollback()
+                    return False, f"Bid must be at least ${min_bid:.2f}"
             
-            # Get previous highest bidder
-            cursor.execute("""SELECT bidder_id FROM bids 
-                            WHERE auction_id = %s 
-                            ORDER BY bid_amount DESC LIMIT 1""", (auction_id,))
-            previous_bidder = cursor.fetchone()
+                # Previous highest bidder is kept on the auction row
+                previous_bidder_id = auction['top_bidder_id']
             
-            # Insert new bid
-            cursor.execute("""INSERT INTO bids (auction_id, bidder_id, bid_amount) 
-                            VALUES (%s, %s, %s)""", 
-                          (auction_id, bidder_id, bid_amount))
+                # Insert the bid and update the auction's current bid, top bidder and
+                # bidder count; the checks above already passed under the row lock,
+                # so the writes go to the server together in one round-trip
+                writes = [
+                    ("""INSERT INTO bids (auction_id, bidder_id, bid_amount)
+                        VALUES (%s, %s, %s)""", (auction_id, bidder_id, bid_amount)),
+                    ("""UPDATE auctions SET current_bid = %s, top_bidder_id = %s,
+                        bid_count = bid_count + %s
+                        WHERE auction_id = %s""",
+                     (bid_amount, bidder_id, 0 if auction['has_bid'] else 1, auction_id)),
+                ]
             
-            # Update auction current bid
-            cursor.execute("""UPDATE auctions SET current_bid = %s 
-                            WHERE auction_id = %s""", 
-                          (bid_amount, auction_id))
-            
-            # Create outbid notification for previous bidder
-            if previous_bidder and previous_bidder['bidder_id'] != bidder_id:
-                self.create_notification(
-                    previous_bidder['bidder_id'],
-                    f"You have been outbid on '{auction['title']}'",
-                    'outbid'
-                )
-            
-            conn.commit()
-            return True, "Bid placed successfully"
+                # Outbid notification for the previous bidder, committed with the bid
+                outbid = previous_bidder_id and previous_bidder_id != bidder_id
+                if outbid:
+                    message = f"You have been outbid on '{auction['title']}'"
+                    writes.append((_SQL_INSERT_NOTIFICATION, (previous_bidder_id, message, 'outbid')))
+
+                for _ in self._run_batch(cursor, writes):
+                    pass
+                conn.commit()
+                if outbid:
+                    self._push_notification(previous_bidder_id, message, 'outbid')
+                return True, "Bid placed successfully"
         
-        except Error as e:
-            conn.rollback()
-            return False, str(e)
-        finally:
-            if conn.is_connected():
-                cursor.close()
-                conn.close()
-    
-    def get_user_bids(self, user_id):
-        """Get all bids placed by a user"""
-        conn = self.get_connection()
-        if not conn:
-            return []
-        
-        try:
-            cursor = conn.cursor(dictionary=True)
-            
-            query = """SELECT b.*, a.title, a.image_path, a.end_time, a.status,
-                      MAX(b2.bid_amount) as current_highest_bid,
-                      CASE WHEN MAX(b2.bid_amount) = b.bid_amount THEN 1 ELSE 0 END as is_winning
-                      FROM bids b
-                      JOIN auctions a ON b.auction_id = a.auction_id
-                      LEFT JOIN bids b2 ON b.auction_id = b2.auction_id
-                      WHERE b.bidder_id = %s
-                      GROUP BY b.bid_id
-                      ORDER BY b.bid_time DESC"""
-            
-            cursor.execute(query, (user_id,))
-            return cursor.fetchall()
-        
-        except Error as e:
-            print(f"Error getting user bids: {e}")
-            return []
-        finally:
-            if conn.is_connected():
-                cursor.close()
-                conn.close()
+            except Error as e:
+                conn.rollback()
+                return False, str(e)
     
     # Auction History and Results
-    def get_user_auctions(self, user_id):
-        """Get all auctions created by a user"""
+    # Batched page queries
+    @staticmethod
+    def _run_batch(cursor, statements):
+        """Send (sql, params) statements to the server in one round-trip
+
+        Returns the driver's per-statement results, which must be iterated.
+        """
+        query = ";\n".join(sql for sql, _ in statements)
+        params = [param for _, sql_params in statements for param in sql_params]
+        return cursor.execute(query, params, multi=True)
+
+    def _fetch_result_sets(self, statements, commit=False):
+        """Run several statements in one round-trip and return the SELECTs' row lists
+
+        Pass commit=True when the batch also contains writes.
+        """
         conn = self.get_connection()
         if not conn:
-            return []
-        
-        try:
-            cursor = conn.cursor(dictionary=True)
-            
-            query = """SELECT a.*, c.category_name,
-                      COUNT(DISTINCT b.bidder_id) as bid_count,
-                      COALESCE(MAX(b.bid_amount), a.starting_bid) as final_bid,
-                      w.username as winner_name
-                      FROM auctions a
-                      LEFT JOIN categories c ON a.category_id = c.category_id
-                      LEFT JOIN bids b ON a.auction_id = b.auction_id
-                      LEFT JOIN users w ON a.winner_id = w.user_id
-                      WHERE a.seller_id = %s
-                      GROUP BY a.auction_id
-                      ORDER BY a.created_at DESC"""
-            
-            cursor.execute(query, (user_id,))
-            return cursor.fetchall()
-        
-        except Error as e:
-            print(f"Error getting user auctions: {e}")
-            return []
-        finally:
-            if conn.is_connected():
-                cursor.close()
-                conn.close()
-    
-    def get_won_auctions(self, user_id):
-        """Get auctions won by a user"""
-        conn = self.get_connection()
-        if not conn:
-            return []
-        
-        try:
-            cursor = conn.cursor(dictionary=True)
+            return None
 
-            query = """SELECT a.*, u.username as seller_name, c.category_name
-                      FROM auctions a
-                      JOIN users u ON a.seller_id = u.user_id
-                      LEFT JOIN categories c ON a.category_id = c.category_id
-                      WHERE a.winner_id = %s AND a.status IN ('completed', 'sold')
-                      ORDER BY a.end_time DESC"""
+        with self._cursor(conn, dictionary=True) as cursor:
+            try:
+                result_sets = []
+                for result in self._run_batch(cursor, statements):
+                    if result.with_rows:
+                        result_sets.append(result.fetchall())
+                if commit:
+                    conn.commit()
+                return result_sets
+
+            except Error as e:
+                print(f"Error running batched queries: {e}")
+                if commit:
+                    conn.rollback()
+                return None
+
+    def get_dashboard_bundle(self, user_id):
+        """Get everything the dashboard shows for a user in one round-trip,
+        marking their notifications read in the same transaction"""
+        keys = ['my_auctions', 'my_bids', 'won_auctions', 'notifications', 'pending_payments']
+        result_sets = self._fetch_result_sets([
+            # The dashboard only lists the latest few of each; history shows them all
+            (_SQL_USER_AUCTIONS + " LIMIT %s", (user_id, 5)),
+            (_SQL_USER_BIDS + " LIMIT %s", (user_id, 5)),
+            (_SQL_WON_AUCTIONS + " LIMIT %s", (user_id, 3)),
+            (_SQL_USER_NOTIFICATIONS, (user_id, 20)),
+            (_SQL_PENDING_PAYMENTS, (user_id,)),
+            (_SQL_USER_TOTALS, (user_id, user_id)),
+            # Runs after the SELECT above, so the page still shows which ones were unread
+            (_SQL_MARK_NOTIFICATIONS_READ, (user_id,)),
+        ], commit=True)
+        if not result_sets:
+            return dict({key: [] for key in keys}, total_spent=_ZERO, total_earned=_ZERO)
+        self.reset_unread_count(user_id)
+        return dict(zip(keys, result_sets), **self._totals(result_sets[-1]))
+
+    def get_history_bundle(self, user_id):
+        """Get a user's auctions, bids and wins for the history page in one round-trip"""
+        keys = ['my_past_auctions', 'my_bid_history', 'won_auctions']
+        result_sets = self._fetch_result_sets([
+            (_SQL_USER_AUCTIONS, (user_id,)),
+            (_SQL_USER_BIDS, (user_id,)),
+            (_SQL_WON_AUCTIONS, (user_id,)),
+            (_SQL_USER_TOTALS, (user_id, user_id)),
+        ])
+        if not result_sets:
+            return dict({key: [] for key in keys}, total_spent=_ZERO, total_earned=_ZERO)
+        return dict(zip(keys, result_sets), **self._totals(result_sets[-1]))
+
+    @staticmethod
+    def _totals(rows):
+        """Pick the Decimal totals out of the _SQL_USER_TOTALS row"""
+        row = rows[0] if rows else {}
+        return {
+            'total_spent': row.get('total_spent') or _ZERO,
+            'total_earned': row.get('total_earned') or _ZERO,
+        }
 
-            cursor.execute(query, (user_id,))
-            return cursor.fetchall()
+    def get_payment_bundle(self, user_id, completed_limit=10):
+        """Get a user's pending and recently completed payments in one round-trip"""
+        keys = ['pending_payments', 'completed_payments']
+        result_sets = self._fetch_result_sets([
+            (_SQL_PENDING_PAYMENTS, (user_id,)),
+            (_SQL_COMPLETED_PAYMENTS, (user_id, completed_limit)),
+        ])
+        if not result_sets:
+            return {key: [] for key in keys}
+        return dict(zip(keys, result_sets))
+
+    def get_auction_columns(self):
+        """Column names of the auctions table, looked up once per process"""
+        if self._auction_columns is None:
+            result_sets = self._fetch_result_sets([("DESCRIBE auctions", ())])
+            if not result_sets:
+                return []
+            self._auction_columns = [col['Field'] for col in result_sets[0]]
+        return self._auction_columns
+
+    def get_payment_debug_bundle(self, user_id):
+        """Get a user's won auctions and pending payments in one round-trip (debug view)"""
+        return self._fetch_result_sets([
+            ("""SELECT auction_id, title, status, winner_id,
+                       payment_status, sold_price, current_bid, end_time
+                FROM auctions
+                WHERE winner_id = %s
+                ORDER BY end_time DESC""", (user_id,)),
+            ("""SELECT a.auction_id, a.title, a.status,
+                       a.payment_status, a.sold_price, a.current_bid,
+                       COALESCE(a.sold_price, a.current_bid) as final_price
+                FROM auctions a
+                WHERE a.winner_id = %s
+                AND a.status IN ('completed', 'sold')
+                AND (a.payment_status IS NULL OR a.payment_status = 'pending')
+                ORDER BY a.end_time DESC""", (user_id,)),
+        ])
 
-        except Error as e:
-            print(f"Error getting won auctions: {e}")
-            return []
-        finally:
-            if conn.is_connected():
-                cursor.close()
-                conn.close()
-    
-    def get_highest_bid(self, auction_id):
-        """Get the highest bid for a given auction"""
-        conn = self.get_connection()
-        if not conn:
-            return None
+    # Notification Functions
+    def publish_notification(self, channel, payload):
+        """Push a notification event to stream subscribers (no-op without Redis)"""
+        if not redis_client:
+            return
+        try:
+            redis_client.publish(f"notifications:{channel}", json.dumps(payload))
+        except Exception as e:
+            print(f"Error publishing notification: {e}")
 
+    def bump_unread_counts(self, user_ids):
+        """Add one to the cached unread notification counters of the given users"""
+        if not redis_client:
+            return
         try:
-            cursor = conn.cursor(dictionary=True)
-            query = """
-                SELECT b.bid_id, b.bidder_id, b.bid_amount, u.username as bidder_name
-                FROM bids b
-                JOIN users u ON b.bidder_id = u.user_id
-                WHERE b.auction_id = %s
-                ORDER BY b.bid_amount DESC
-                LIMIT 1
-            """
-            cursor.execute(query, (auction_id,))
-            result = cursor.fetchone()
-            return result
-        except Error as e:
-            print(f"Error getting highest bid: {e}")
-            return None
-        finally:
-            if conn.is_connected():
-                cursor.close()
-                conn.close()
+            pipe = redis_client.pipeline(transaction=False)
+            for user_id in user_ids:
+                pipe.eval(_INCR_IF_EXISTS, 1, f"notif:unread:{user_id}")
+            pipe.execute()
+        except Exception as e:
+            print(f"Error updating unread counts: {e}")
+
+    def reset_unread_count(self, user_id):
+        """Zero a user's cached unread notification counter after marking them read"""
+        if not redis_client:
+            return
+        try:
+            redis_client.set(f"notif:unread:{user_id}", 0, ex=Config.UNREAD_COUNT_TTL)
+        except Exception as e:
+            print(f"Error resetting unread count: {e}")
+
+    def get_unread_notification_count(self, user_id):
+        """Number of unread notifications, from the Redis counter when available"""
+        key = f"notif:unread:{user_id}"
+        if redis_client:
+            try:
+                cached = redis_client.get(key)
+                if cached is not None:
+                    return int(cached)
+            except Exception as e:
+                print(f"Error reading unread count: {e}")
 
-    # Notification Functions
-    def create_notification(self, user_id, message, notification_type='new_auction'):
-        """Create a notification for a user"""
         conn = self.get_connection()
         if not conn:
-            return False
-        
-        try:
-            cursor = conn.cursor()
-            query = """INSERT INTO notifications (user_id, message, type) 
-                      VALUES (%s, %s, %s)"""
-            cursor.execute(query, (user_id, message, notification_type))
-            conn.commit()
-            return True
-        
-        except Error as e:
-            print(f"Error creating notification: {e}")
-            return False
-        finally:
-            if conn.is_connected():
-                cursor.close()
-                conn.close()
-    
-    def get_user_notifications(self, user_id, unread_only=False, limit=20):
-        """Get notifications for a user"""
+            return 0
+
+        with self._cursor(conn) as cursor:
+            try:
+                cursor.execute("SELECT COUNT(*) FROM notifications WHERE user_id = %s AND is_read = FALSE",
+                             (user_id,))
+                count = cursor.fetchone()[0]
+                if redis_client:
+                    # nx so a counter bumped since our COUNT(*) is not overwritten
+                    redis_client.set(key, count, ex=Config.UNREAD_COUNT_TTL, nx=True)
+                return count
+
+            except Exception as e:
+                print(f"Error counting notifications: {e}")
+                return 0
+
+    def _insert_notification(self, cursor, user_id, message, notification_type):
+        """Write a notification inside the caller's transaction
+
+        Call _push_notification once that transaction has committed.
+        """
+        cursor.execute(_SQL_INSERT_NOTIFICATION, (user_id, message, notification_type))
+
+    def _push_notification(self, user_id, message, notification_type):
+        """Bump the unread counter and publish a committed notification"""
+        self.bump_unread_counts([user_id])
+        self.publish_notification(user_id, {'message': message, 'type': notification_type})
+
+    def get_notifications_with_unread_count(self, user_id, limit=20):
+        """Get a user's latest notifications and their unread total in one query"""
         conn = self.get_connection()
         if not conn:
-            return []
+            return [], 0
 
-        try:
-            cursor = conn.cursor(dictionary=True)
+        with self._cursor(conn, dictionary=True) as cursor:
+            try:
+                cursor.execute(_SQL_NOTIFICATIONS_WITH_UNREAD, (user_id, user_id, limit))
+                notifications = cursor.fetchall()
+                unread_count = 0
+                for notification in notifications:
+                    unread_count = notification.pop('unread_count')
+                return notifications, unread_count
 
-            query = "SELECT * FROM notifications WHERE user_id = %s"
-            if unread_only:
-                query += " AND is_read = FALSE"
-            query += f" ORDER BY created_at DESC LIMIT {limit}"
+            except Error as e:
+                print(f"Error getting notifications: {e}")
+                return [], 0
 
-            cursor.execute(query, (user_id,))
-            return cursor.fetchall()
-        
-        except Error as e:
-            print(f"Error getting notifications: {e}")
-            return []
-        finally:
-            if conn.is_connected():
-                cursor.close()
-                conn.close()
-    
     def mark_notifications_read(self, user_id):
         """Mark all notifications as read for a user"""
         conn = self.get_connection()
         if not conn:
             return False
         
-        try:
-            cursor = conn.cursor()
-            query = "UPDATE notifications SET is_read = TRUE WHERE user_id = %s"
-            cursor.execute(query, (user_id,))
-            conn.commit()
-            return True
+        with self._cursor(conn) as cursor:
+            try:
+                cursor.execute(_SQL_MARK_NOTIFICATIONS_READ, (user_id,))
+                conn.commit()
+                self.reset_unread_count(user_id)
+                return True
         
-        except Error as e:
-            print(f"Error marking notifications: {e}")
-            return False
-        finally:
-            if conn.is_connected():
-                cursor.close()
-                conn.close()
+            except Error as e:
+                print(f"Error marking notifications: {e}")
+                return False
     
     def create_notification_for_new_auction(self, auction_id, title):
         """Create notifications for all users about a new auction"""
@@ -491,140 +825,150 @@ class DatabaseManager:
         if not conn:
             return False
         
-        try:
-            cursor = conn.cursor()
-            
-            # Get all users except the seller
-            cursor.execute("""SELECT user_id FROM users 
-                            WHERE user_id != (SELECT seller_id FROM auctions 
-                                             WHERE auction_id = %s)""", (auction_id,))
-            users = cursor.fetchall()
-            
-            message = f"New auction available: '{title}'"
-            
-            for user in users:
-                cursor.execute("""INSERT INTO notifications (user_id, message, type) 
-                                VALUES (%s, %s, 'new_auction')""", 
-                              (user[0], message))
-            
-            conn.commit()
-            return True
+        with self._cursor(conn) as cursor:
+            try:
+                message = f"New auction available: '{title}'"
+                # Every user except the seller
+                recipients = """FROM users WHERE user_id != (SELECT seller_id FROM auctions
+                                                            WHERE auction_id = %s)"""
+
+                if redis_client:
+                    # The ids are needed to bump each user's cached unread counter;
+                    # executemany folds the inserts into one multi-row INSERT
+                    cursor.execute(f"SELECT user_id {recipients}", (auction_id,))
+                    users = cursor.fetchall()
+                    cursor.executemany("""INSERT INTO notifications (user_id, message, type)
+                                        VALUES (%s, %s, 'new_auction')""",
+                                      [(user[0], message) for user in users])
+                else:
+                    # Nothing to update per user, so the server fans the rows out itself
+                    users = []
+                    cursor.execute(f"""INSERT INTO notifications (user_id, message, type)
+                                     SELECT user_id, %s, 'new_auction' {recipients}""",
+                                   (message, auction_id))
+
+                conn.commit()
+                self.bump_unread_counts(user[0] for user in users)
+                self.publish_notification('broadcast', {'message': message, 'type': 'new_auction'})
+                return True
         
-        except Error as e:
-            print(f"Error creating notifications: {e}")
-            conn.rollback()
-            return False
-        finally:
-            if conn.is_connected():
-                cursor.close()
-                conn.close()
+            except Error as e:
+                print(f"Error creating notifications: {e}")
+                conn.rollback()
+                return False
     
+    def claim_job(self, name, min_interval):
+        """Claim a periodic job run; False if another process ran it within min_interval seconds"""
+        conn = self.get_connection()
+        if not conn:
+            return False
+
+        with self._cursor(conn) as cursor:
+            try:
+                cursor.execute("""UPDATE system_jobs SET last_run = NOW()
+                                WHERE name = %s AND last_run <= NOW() - INTERVAL %s SECOND""",
+                              (name, min_interval))
+                conn.commit()
+                return cursor.rowcount == 1
+
+            except Error as e:
+                # Without the system_jobs table every process runs the job, as before
+                print(f"Error claiming job {name}: {e}")
+                return True
+
     def close_expired_auctions(self):
         """Close auctions that have ended and declare winners"""
         conn = self.get_connection()
         if not conn:
             return False
         
-        try:
-            cursor = conn.cursor(dictionary=True)
+        with self._cursor(conn, dictionary=True) as cursor:
+            try:
+                # Get expired active auctions and their highest bidder
+                # (range scan on idx_active's (status, end_time) prefix)
+                cursor.execute("""SELECT a.auction_id, a.title, a.top_bidder_id as winner
+                                FROM auctions a
+                                WHERE a.status = 'active' AND a.end_time <= NOW()
+                                FOR UPDATE""")
             
-            # Get expired active auctions
-            cursor.execute("""SELECT a.*, MAX(b.bid_amount) as winning_bid, 
-                            b.bidder_id as winner
-                            FROM auctions a
-                            LEFT JOIN bids b ON a.auction_id = b.auction_id
-                            WHERE a.status = 'active' AND a.end_time <= NOW()
-                            GROUP BY a.auction_id""")
-            
-            expired_auctions = cursor.fetchall()
-            
-            for auction in expired_auctions:
-                # Update auction status and winner
-                if auction['winner']:
-                    cursor.execute("""UPDATE auctions 
-                                    SET status = 'completed', winner_id = %s 
-                                    WHERE auction_id = %s""",
-                                  (auction['winner'], auction['auction_id']))
-                    
-                    # Notify winner
-                    self.create_notification(
-                        auction['winner'],
-                        f"Congratulations! You won the auction for '{auction['title']}'",
-                        'won'
-                    )
-                else:
-                    cursor.execute("""UPDATE auctions SET status = 'completed' 
-                                    WHERE auction_id = %s""", (auction['auction_id'],))
-            
-            conn.commit()
-            return True
+                expired_auctions = cursor.fetchall()
+                if not expired_auctions:
+                    conn.commit()
+                    return True
+
+                # Close them all in one statement; auctions without bids keep winner_id NULL
+                auction_ids = [auction['auction_id'] for auction in expired_auctions]
+                placeholders = ', '.join(['%s'] * len(auction_ids))
+                cursor.execute(f"""UPDATE auctions SET status = 'completed', winner_id = top_bidder_id
+                                 WHERE auction_id IN ({placeholders})""", auction_ids)
+
+                # Notify winners with one multi-row INSERT in the same transaction
+                notifications = [(auction['winner'], f"Congratulations! You won the auction for '{auction['title']}'")
+                                 for auction in expired_auctions if auction['winner']]
+                cursor.executemany("""INSERT INTO notifications (user_id, message, type)
+                                    VALUES (%s, %s, 'won')""", notifications)
+
+                conn.commit()
+                self.bump_unread_counts(user_id for user_id, _ in notifications)
+                for user_id, message in notifications:
+                    self.publish_notification(user_id, {'message': message, 'type': 'won'})
+                return True
         
-        except Error as e:
-            print(f"Error closing auctions: {e}")
-            conn.rollback()
-            return False
-        finally:
-            if conn.is_connected():
-                cursor.close()
-                conn.close()
+            except Error as e:
+                print(f"Error closing auctions: {e}")
+                conn.rollback()
+                return False
     
     def get_categories(self):
         """Get all auction categories"""
-        conn = self.get_connection()
+        conn = self.get_read_connection()
         if not conn:
             return []
         
-        try:
-            cursor = conn.cursor(dictionary=True)
-            cursor.execute("SELECT * FROM categories ORDER BY category_name")
-            return cursor.fetchall()
+        with self._cursor(conn, dictionary=True) as cursor:
+            try:
+                cursor.execute("SELECT * FROM categories ORDER BY category_name")
+                return cursor.fetchall()
         
-        except Error as e:
-            print(f"Error getting categories: {e}")
-            return []
-        finally:
-            if conn.is_connected():
-                cursor.close()
-                conn.close()
+            except Error as e:
+                print(f"Error getting categories: {e}")
+                return []
 
     def update_auction_info(self, auction_id, title, description, category_id, duration_days, original_end_time):
         try:
             conn = self.get_connection()
-            cur = conn.cursor()
-
-            # Get current auction to calculate original duration
-            cur.execute("""
-                SELECT end_time, created_at FROM auctions WHERE auction_id=%s
-            """, (auction_id,))
-            current = cur.fetchone()
-
-            if current:
-                current_end_time = current[0]
-                created_at = current[1]
-                # Calculate the original duration in days
-                original_duration = (current_end_time - created_at).days
-
-                # Only update end_time if duration_days is provided AND has changed
-                if duration_days is not None and duration_days != original_duration:
-                    # Recalculate end_time from now
-                    end_time = datetime.now() + timedelta(days=duration_days)
-                    cur.execute("""
-                        UPDATE auctions
-                        SET title=%s, description=%s, category_id=%s, end_time=%s
-                        WHERE auction_id=%s
-                    """, (title, description, category_id, end_time, auction_id))
-                else:
-                    # Keep original end_time, only update other fields
-                    cur.execute("""
-                        UPDATE auctions
-                        SET title=%s, description=%s, category_id=%s
-                        WHERE auction_id=%s
-                    """, (title, description, category_id, auction_id))
-
-            conn.commit()
-            cur.close()
-            conn.close()
-            return True
+            with self._cursor(conn) as cur:
+                # Get current auction to calculate original duration
+                cur.execute("""
+                    SELECT end_time, created_at FROM auctions WHERE auction_id=%s
+                """, (auction_id,))
+                current = cur.fetchone()
+
+                if current:
+                    current_end_time = current[0]
+                    created_at = current[1]
+                    # Calculate the original duration in days
+                    original_duration = (current_end_time - created_at).days
+
+                    # Only update end_time if duration_days is provided AND has changed
+                    if duration_days is not None and duration_days != original_duration:
+                        # Recalculate end_time from now
+                        end_time = datetime.now() + timedelta(days=duration_days)
+                        cur.execute("""
+                            UPDATE auctions
+                            SET title=%s, description=%s, category_id=%s, end_time=%s
+                            WHERE auction_id=%s
+                        """, (title, description, category_id, end_time, auction_id))
+                    else:
+                        # Keep original end_time, only update other fields
+                        cur.execute("""
+                            UPDATE auctions
+                            SET title=%s, description=%s, category_id=%s
+                            WHERE auction_id=%s
+                        """, (title, description, category_id, auction_id))
+
+                conn.commit()
+                return True
         except Exception as e:
             print("Error updating auction:", e)
             return False
@@ -632,12 +976,10 @@ class DatabaseManager:
     def delete_auction(self, auction_id):
         try:
             conn = self.get_connection()
-            cur = conn.cursor()
-            cur.execute("DELETE FROM auctions WHERE auction_id=%s", (auction_id,))
-            conn.commit()
-            cur.close()
-            conn.close()
-            return True
+            with self._cursor(conn) as cur:
+                cur.execute("DELETE FROM auctions WHERE auction_id=%s", (auction_id,))
+                conn.commit()
+                return True
         except Exception as e:
             print("Error deleting auction:", e)
             return False
@@ -649,72 +991,50 @@ class DatabaseManager:
         if not conn:
             return False, "Database connection failed"
 
-        try:
-            cursor = conn.cursor(dictionary=True)
-
-            # Get highest bid
-            highest_bid = self.get_highest_bid(auction_id)
-            if not highest_bid:
-                return False, "No bids yet — cannot sell immediately."
-
-            bidder_id = highest_bid['bidder_id']
-            bid_amount = highest_bid['bid_amount']
-
-            # Update auction as sold
-            cursor.execute("""
-                UPDATE auctions
-                SET status = 'sold',
-                    sold_price = %s,
-                    winner_id = %s,
-                    end_time = NOW()
-                WHERE auction_id = %s
-            """, (bid_amount, bidder_id, auction_id))
-
-            # Create notification for buyer
-            message = f"Congratulations! You won auction #{auction_id} for RM{bid_amount:.2f}. Please complete your payment."
-            self.create_notification(bidder_id, message, 'won')
-
-            conn.commit()
-            return True, "Auction sold immediately to highest bidder."
+        with self._cursor(conn, dictionary=True) as cursor:
+            try:
+                # place_bid keeps the top bidder and amount on the auction row; lock it so
+                # a bid arriving now cannot change the winner under us
+                cursor.execute("""SELECT title, status, top_bidder_id, current_bid FROM auctions
+                                WHERE auction_id = %s FOR UPDATE""", (auction_id,))
+                auction = cursor.fetchone()
+                if not auction or auction['status'] != 'active':
+                    # A second click, or the expiry sweep, already closed it
+                    conn.rollback()
+                    return False, "This auction has already ended."
+                if not auction['top_bidder_id']:
+                    conn.rollback()
+                    return False, "No bids yet — cannot sell immediately."
+
+                bidder_id = auction['top_bidder_id']
+                bid_amount = auction['current_bid']
+
+                # Update auction as sold
+                cursor.execute("""
+                    UPDATE auctions
+                    SET status = 'sold',
+                        sold_price = %s,
+                        winner_id = %s,
+                        end_time = NOW()
+                    WHERE auction_id = %s AND status = 'active'
+                """, (bid_amount, bidder_id, auction_id))
+                if cursor.rowcount != 1:
+                    conn.rollback()
+                    return False, "This auction has already ended."
+
+                # Notify the buyer in the same transaction
+                message = (f"Congratulations! You won auction #{auction_id} '{auction['title']}' "
+                           f"for RM{bid_amount:.2f}. Please complete your payment.")
+                self._insert_notification(cursor, bidder_id, message, 'won')
+
+                conn.commit()
+                self._push_notification(bidder_id, message, 'won')
+                return True, "Auction sold immediately to highest bidder."
         
-        except Error as e:
-            print("❌ MySQL error in sell_now():", e)  # <-- add this
-            conn.rollback()
-            return False, f"MySQL error: {str(e)}"  # <-- change message to show real cause
-        finally:
-            if conn.is_connected():
-                cursor.close()
-                conn.close()
-
-    def get_pending_payments(self, user_id):
-        """Get auctions won by user that require payment"""
-        conn = self.get_connection()
-        if not conn:
-            return []
-
-        try:
-            cursor = conn.cursor(dictionary=True)
-
-            query = """SELECT a.*, u.username as seller_name, c.category_name,
-                      COALESCE(a.sold_price, a.current_bid) as final_price
-                      FROM auctions a
-                      JOIN users u ON a.seller_id = u.user_id
-                      LEFT JOIN categories c ON a.category_id = c.category_id
-                      WHERE a.winner_id = %s
-                      AND a.status IN ('completed', 'sold')
-                      AND (a.payment_status IS NULL OR a.payment_status = 'pending')
-                      ORDER BY a.end_time DESC"""
-
-            cursor.execute(query, (user_id,))
-            return cursor.fetchall()
-
-        except Error as e:
-            print(f"Error getting pending payments: {e}")
-            return []
-        finally:
-            if conn.is_connected():
-                cursor.close()
-                conn.close()
+            except Error as e:
+                print("❌ MySQL error in sell_now():", e)  # <-- add this
+                conn.rollback()
+                return False, f"MySQL error: {str(e)}"  # <-- change message to show real cause
 
     def mark_payment_complete(self, auction_id, user_id):
         """Mark an auction payment as complete"""
@@ -722,60 +1042,49 @@ class DatabaseManager:
         if not conn:
             return False
 
-        try:
-            cursor = conn.cursor()
-
-            # Verify the user is the winner before allowing payment
-            cursor.execute("""UPDATE auctions
-                            SET payment_status = 'paid'
-                            WHERE auction_id = %s AND winner_id = %s""",
-                          (auction_id, user_id))
-
-            conn.commit()
-
-            if cursor.rowcount > 0:
-                # Notify seller that payment is received
+        with self._cursor(conn) as cursor:
+            try:
+                # Verify the user is the winner before allowing payment
+                cursor.execute("""UPDATE auctions
+                                SET payment_status = 'paid'
+                                WHERE auction_id = %s AND winner_id = %s""",
+                              (auction_id, user_id))
+                if cursor.rowcount == 0:
+                    conn.rollback()
+                    return False
+
+                # Notify seller that payment is received, in the same transaction
                 cursor.execute("SELECT seller_id, title FROM auctions WHERE auction_id = %s",
                              (auction_id,))
-                auction_info = cursor.fetchone()
-                if auction_info:
-                    self.create_notification(
-                        auction_info[0],
-                        f"Payment received for '{auction_info[1]}'",
-                        'won'
-                    )
+                seller_id, title = cursor.fetchone()
+                message = f"Payment received for '{title}'"
+                self._insert_notification(cursor, seller_id, message, 'won')
+
+                conn.commit()
+                self._push_notification(seller_id, message, 'won')
                 return True
-            return False
 
-        except Error as e:
-            print(f"Error marking payment complete: {e}")
-            conn.rollback()
-            return False
-        finally:
-            if conn.is_connected():
-                cursor.close()
-                conn.close()
+            except Error as e:
+                print(f"Error marking payment complete: {e}")
+                conn.rollback()
+                return False
 # ==================== WALLET OPERATIONS ====================
 
     def get_wallet_balance(self, user_id):
         """Get user's current wallet balance"""
         conn = self.get_connection()
         if not conn:
-            return 0.00
+            return _ZERO
 
-        try:
-            cursor = conn.cursor(dictionary=True)
-            cursor.execute("SELECT wallet_balance FROM users WHERE user_id = %s", (user_id,))
-            result = cursor.fetchone()
-            return float(result['wallet_balance']) if result else 0.00
+        with self._cursor(conn, dictionary=True) as cursor:
+            try:
+                cursor.execute("SELECT wallet_balance FROM users WHERE user_id = %s", (user_id,))
+                result = cursor.fetchone()
+                return result['wallet_balance'] if result else _ZERO
 
-        except Error as e:
-            print(f"Error getting wallet balance: {e}")
-            return 0.00
-        finally:
-            if conn.is_connected():
-                cursor.close()
-                conn.close()
+            except Error as e:
+                print(f"Error getting wallet balance: {e}")
+                return _ZERO
 
     def add_to_wallet(self, user_id, amount, transaction_type, description, reference_id=None):
         """Add funds to user's wallet and record transaction"""
@@ -783,39 +1092,29 @@ class DatabaseManager:
         if not conn:
             return False
 
-        try:
-            cursor = conn.cursor(dictionary=True)
-
-            # Get current balance
-            cursor.execute("SELECT wallet_balance FROM users WHERE user_id = %s", (user_id,))
-            result = cursor.fetchone()
-            current_balance = float(result['wallet_balance']) if result else 0.00
-
-            # Calculate new balance
-            new_balance = current_balance + float(amount)
-
-            # Update user's wallet balance
-            cursor.execute("""UPDATE users SET wallet_balance = %s WHERE user_id = %s""",
-                         (new_balance, user_id))
-
-            # Record transaction
-            cursor.execute("""
-                INSERT INTO wallet_transactions
-                (user_id, transaction_type, amount, balance_after, description, reference_id)
-                VALUES (%s, %s, %s, %s, %s, %s)
-            """, (user_id, transaction_type, amount, new_balance, description, reference_id))
-
-            conn.commit()
-            return True
+        with self._cursor(conn) as cursor:
+            try:
+                # Increment in SQL so concurrent top-ups cannot overwrite each other
+                cursor.execute("""UPDATE users SET wallet_balance = wallet_balance + %s
+                                WHERE user_id = %s""", (amount, user_id))
+                if cursor.rowcount != 1:
+                    conn.rollback()
+                    return False
+
+                # Record transaction with the balance the UPDATE left (the row stays locked)
+                cursor.execute("""
+                    INSERT INTO wallet_transactions
+                    (user_id, transaction_type, amount, balance_after, description, reference_id)
+                    SELECT user_id, %s, %s, wallet_balance, %s, %s FROM users WHERE user_id = %s
+                """, (transaction_type, amount, description, reference_id, user_id))
+
+                conn.commit()
+                return True
 
-        except Error as e:
-            print(f"Error adding to wallet: {e}")
-            conn.rollback()
-            return False
-        finally:
-            if conn.is_connected():
-                cursor.close()
-                conn.close()
+            except Error as e:
+                print(f"Error adding to wallet: {e}")
+                conn.rollback()
+                return False
 
     def deduct_from_wallet(self, user_id, amount, transaction_type, description, reference_id=None):
         """Deduct funds from user's wallet and record transaction"""
@@ -823,43 +1122,30 @@ class DatabaseManager:
         if not conn:
             return False, "Database connection failed"
 
-        try:
-            cursor = conn.cursor(dictionary=True)
-
-            # Get current balance
-            cursor.execute("SELECT wallet_balance FROM users WHERE user_id = %s", (user_id,))
-            result = cursor.fetchone()
-            current_balance = float(result['wallet_balance']) if result else 0.00
-
-            # Check if sufficient balance
-            if current_balance < float(amount):
-                return False, "Insufficient wallet balance"
-
-            # Calculate new balance
-            new_balance = current_balance - float(amount)
-
-            # Update user's wallet balance
-            cursor.execute("""UPDATE users SET wallet_balance = %s WHERE user_id = %s""",
-                         (new_balance, user_id))
-
-            # Record transaction
-            cursor.execute("""
-                INSERT INTO wallet_transactions
-                (user_id, transaction_type, amount, balance_after, description, reference_id)
-                VALUES (%s, %s, %s, %s, %s, %s)
-            """, (user_id, transaction_type, amount, new_balance, description, reference_id))
-
-            conn.commit()
-            return True, "Success"
-
-        except Error as e:
-            print(f"Error deducting from wallet: {e}")
-            conn.rollback()
-            return False, str(e)
-        finally:
-            if conn.is_connected():
-                cursor.close()
-                conn.close()
+        with self._cursor(conn) as cursor:
+            try:
+                # Check and deduct in one statement so concurrent cash-outs cannot overdraw
+                cursor.execute("""UPDATE users SET wallet_balance = wallet_balance - %s
+                                WHERE user_id = %s AND wallet_balance >= %s""",
+                             (amount, user_id, amount))
+                if cursor.rowcount != 1:
+                    conn.rollback()
+                    return False, "Insufficient wallet balance"
+
+                # Record transaction with the balance the UPDATE left (the row stays locked)
+                cursor.execute("""
+                    INSERT INTO wallet_transactions
+                    (user_id, transaction_type, amount, balance_after, description, reference_id)
+                    SELECT user_id, %s, %s, wallet_balance, %s, %s FROM users WHERE user_id = %s
+                """, (transaction_type, amount, description, reference_id, user_id))
+
+                conn.commit()
+                return True, "Success"
+
+            except Error as e:
+                print(f"Error deducting from wallet: {e}")
+                conn.rollback()
+                return False, str(e)
 
     def get_wallet_transactions(self, user_id, limit=50):
         """Get user's wallet transaction history"""
@@ -867,24 +1153,22 @@ class DatabaseManager:
         if not conn:
             return []
 
-        try:
-            cursor = conn.cursor(dictionary=True)
-            query = """
-                SELECT * FROM wallet_transactions
-                WHERE user_id = %s
-                ORDER BY created_at DESC
-                LIMIT %s
-            """
-            cursor.execute(query, (user_id, limit))
-            return cursor.fetchall()
-
-        except Error as e:
-            print(f"Error getting wallet transactions: {e}")
-            return []
-        finally:
-            if conn.is_connected():
-                cursor.close()
-                conn.close()
+        with self._cursor(conn, dictionary=True) as cursor:
+            try:
+                # Only the columns the wallet page lists
+                query = """
+                    SELECT transaction_type, amount, balance_after, description, created_at
+                    FROM wallet_transactions
+                    WHERE user_id = %s
+                    ORDER BY created_at DESC
+                    LIMIT %s
+                """
+                cursor.execute(query, (user_id, limit))
+                return cursor.fetchall()
+
+            except Error as e:
+                print(f"Error getting wallet transactions: {e}")
+                return []
 
     def process_wallet_payment(self, auction_id, buyer_id):
         """Process payment using wallet (buyer pays, seller receives)"""
@@ -892,159 +1176,130 @@ class DatabaseManager:
         if not conn:
             return False, "Database connection failed"
 
-        try:
-            cursor = conn.cursor(dictionary=True)
-
-            # Get auction details
-            cursor.execute("""
-                SELECT seller_id, title, sold_price, current_bid, winner_id
-                FROM auctions
-                WHERE auction_id = %s
-            """, (auction_id,))
-            auction = cursor.fetchone()
-
-            if not auction:
-                return False, "Auction not found"
-
-            if auction['winner_id'] != buyer_id:
-                return False, "You are not the winner of this auction"
-
-            seller_id = auction['seller_id']
-            amount = float(auction['sold_price'] or auction['current_bid'])
-            title = auction['title']
-
-            # Get buyer's wallet balance
-            cursor.execute("SELECT wallet_balance FROM users WHERE user_id = %s", (buyer_id,))
-            buyer = cursor.fetchone()
-            buyer_balance = float(buyer['wallet_balance']) if buyer else 0.00
-
-            if buyer_balance < amount:
-                return False, f"Insufficient wallet balance. You need {amount - buyer_balance:.2f} more."
-
-            # Deduct from buyer
-            new_buyer_balance = buyer_balance - amount
-            cursor.execute("UPDATE users SET wallet_balance = %s WHERE user_id = %s",
-                         (new_buyer_balance, buyer_id))
-
-            # Add to seller
-            cursor.execute("SELECT wallet_balance FROM users WHERE user_id = %s", (seller_id,))
-            seller = cursor.fetchone()
-            seller_balance = float(seller['wallet_balance']) if seller else 0.00
-            new_seller_balance = seller_balance + amount
-            cursor.execute("UPDATE users SET wallet_balance = %s WHERE user_id = %s",
-                         (new_seller_balance, seller_id))
-
-            # Record buyer transaction
-            cursor.execute("""
-                INSERT INTO wallet_transactions
-                (user_id, transaction_type, amount, balance_after, description, reference_id)
-                VALUES (%s, 'payment_made', %s, %s, %s, %s)
-            """, (buyer_id, amount, new_buyer_balance, f"Payment for '{title}'", auction_id))
-
-            # Record seller transaction
-            cursor.execute("""
-                INSERT INTO wallet_transactions
-                (user_id, transaction_type, amount, balance_after, description, reference_id)
-                VALUES (%s, 'payment_received', %s, %s, %s, %s)
-            """, (seller_id, amount, new_seller_balance, f"Payment received for '{title}'", auction_id))
-
-            # Mark auction as paid
-            cursor.execute("UPDATE auctions SET payment_status = 'paid' WHERE auction_id = %s",
-                         (auction_id,))
-
-            # Notify seller
-            self.create_notification(
-                seller_id,
-                f"Payment of RM{amount:.2f} received for '{title}' (added to wallet)",
-                'won'
-            )
-
-            conn.commit()
-            return True, "Payment completed successfully using wallet"
-
-        except Error as e:
-            print(f"Error processing wallet payment: {e}")
-            conn.rollback()
-            return False, str(e)
-        finally:
-            if conn.is_connected():
-                cursor.close()
-                conn.close()
+        with self._cursor(conn, dictionary=True) as cursor:
+            try:
+                # Lock the auction row so two payment requests cannot both go through
+                cursor.execute("""
+                    SELECT seller_id, title, sold_price, current_bid, winner_id, payment_status
+                    FROM auctions
+                    WHERE auction_id = %s
+                    FOR UPDATE
+                """, (auction_id,))
+                auction = cursor.fetchone()
+
+                if not auction:
+                    conn.rollback()
+                    return False, "Auction not found"
+
+                if auction['winner_id'] != buyer_id:
+                    conn.rollback()
+                    return False, "You are not the winner of this auction"
+
+                if auction['payment_status'] == 'paid':
+                    conn.rollback()
+                    return False, "This auction has already been paid"
+
+                seller_id = auction['seller_id']
+                amount = auction['sold_price'] or auction['current_bid']
+                title = auction['title']
+
+                # Check and deduct in one statement so concurrent payments cannot overdraw
+                cursor.execute("""UPDATE users SET wallet_balance = wallet_balance - %s
+                                WHERE user_id = %s AND wallet_balance >= %s""",
+                             (amount, buyer_id, amount))
+                if cursor.rowcount != 1:
+                    cursor.execute("SELECT wallet_balance FROM users WHERE user_id = %s", (buyer_id,))
+                    buyer = cursor.fetchone()
+                    buyer_balance = buyer['wallet_balance'] if buyer else _ZERO
+                    conn.rollback()
+                    return False, f"Insufficient wallet balance. You need {amount - buyer_balance:.2f} more."
+
+                # total_earned is kept running on the user row instead of summing the ledger
+                cursor.execute("""UPDATE users SET wallet_balance = wallet_balance + %s,
+                                total_earned = total_earned + %s WHERE user_id = %s""",
+                             (amount, amount, seller_id))
+
+                # Record both transactions with the balances the UPDATEs left (rows stay locked)
+                cursor.execute("""
+                    INSERT INTO wallet_transactions
+                    (user_id, transaction_type, amount, balance_after, description, reference_id)
+                    SELECT user_id, 'payment_made', %s, wallet_balance, %s, %s FROM users WHERE user_id = %s
+                """, (amount, f"Payment for '{title}'", auction_id, buyer_id))
+
+                cursor.execute("""
+                    INSERT INTO wallet_transactions
+                    (user_id, transaction_type, amount, balance_after, description, reference_id)
+                    SELECT user_id, 'payment_received', %s, wallet_balance, %s, %s FROM users WHERE user_id = %s
+                """, (amount, f"Payment received for '{title}'", auction_id, seller_id))
+
+                # Mark auction as paid
+                # NULL counts as pending, like the pending-payments query
+                cursor.execute("""UPDATE auctions SET payment_status = 'paid'
+                                WHERE auction_id = %s
+                                AND (payment_status IS NULL OR payment_status = 'pending')""",
+                             (auction_id,))
+                if cursor.rowcount != 1:
+                    conn.rollback()
+                    return False, "This auction has already been paid"
 
-    def get_total_earned(self, user_id):
-        """Get total amount earned by seller from paid auctions"""
-        conn = self.get_connection()
-        if not conn:
-            return 0.00
+                # Notify the seller in the same transaction
+                message = f"Payment of RM{amount:.2f} received for '{title}' (added to wallet)"
+                self._insert_notification(cursor, seller_id, message, 'won')
 
-        try:
-            cursor = conn.cursor(dictionary=True)
-            query = """
-                SELECT SUM(amount) as total_earned
-                FROM wallet_transactions
-                WHERE user_id = %s AND transaction_type = 'payment_received'
-            """
-            cursor.execute(query, (user_id,))
-            result = cursor.fetchone()
-            return float(result['total_earned']) if result and result['total_earned'] else 0.00
+                conn.commit()
+                self._push_notification(seller_id, message, 'won')
+                return True, "Payment completed successfully using wallet"
 
-        except Error as e:
-            print(f"Error getting total earned: {e}")
-            return 0.00
-        finally:
-            if conn.is_connected():
-                cursor.close()
-                conn.close()
+            except Error as e:
+                print(f"Error processing wallet payment: {e}")
+                conn.rollback()
+                return False, str(e)
 
     def get_auction_stats(self):
         """Get quick stats for browse page"""
-        conn = self.get_connection()
+        conn = self.get_read_connection()
         if not conn:
             return {'total_active': 0, 'ending_today': 0, 'new_this_week': 0}
 
-        try:
-            cursor = conn.cursor(dictionary=True)
-            stats = {}
-
-            # Total active auctions
-            cursor.execute("""
-                SELECT COUNT(*) as count
-                FROM auctions
-                WHERE status = 'active' AND end_time > NOW()
-            """)
-            result = cursor.fetchone()
-            stats['total_active'] = result['count'] if result else 0
-
-            # Auctions ending today
-            cursor.execute("""
-                SELECT COUNT(*) as count
-                FROM auctions
-                WHERE status = 'active'
-                AND DATE(end_time) = CURDATE()
-                AND end_time > NOW()
-            """)
-            result = cursor.fetchone()
-            stats['ending_today'] = result['count'] if result else 0
-
-            # New auctions this week
-            cursor.execute("""
-                SELECT COUNT(*) as count
-                FROM auctions
-                WHERE status = 'active'
-                AND created_at >= DATE_SUB(NOW(), INTERVAL 7 DAY)
-            """)
-            result = cursor.fetchone()
-            stats['new_this_week'] = result['count'] if result else 0
-
-            return stats
-
-        except Error as e:
-            print(f"Error getting auction stats: {e}")
-            return {'total_active': 0, 'ending_today': 0, 'new_this_week': 0}
-        finally:
-            if conn.is_connected():
-                cursor.close()
-                conn.close()
+        with self._cursor(conn, dictionary=True) as cursor:
+            try:
+                stats = {}
+
+                # Total active auctions
+                cursor.execute("""
+                    SELECT COUNT(*) as count
+                    FROM auctions
+                    WHERE status = 'active' AND end_time > NOW()
+                """)
+                result = cursor.fetchone()
+                stats['total_active'] = result['count'] if result else 0
+
+                # Auctions ending today
+                cursor.execute("""
+                    SELECT COUNT(*) as count
+                    FROM auctions
+                    WHERE status = 'active'
+                    AND DATE(end_time) = CURDATE()
+                    AND end_time > NOW()
+                """)
+                result = cursor.fetchone()
+                stats['ending_today'] = result['count'] if result else 0
+
+                # New auctions this week
+                cursor.execute("""
+                    SELECT COUNT(*) as count
+                    FROM auctions
+                    WHERE status = 'active'
+                    AND created_at >= DATE_SUB(NOW(), INTERVAL 7 DAY)
+                """)
+                result = cursor.fetchone()
+                stats['new_this_week'] = result['count'] if result else 0
+
+                return stats
+
+            except Error as e:
+                print(f"Error getting auction stats: {e}")
+                return {'total_active': 0, 'ending_today': 0, 'new_this_week': 0}
 
 # Create a singleton instance
 db_manager = DatabaseManager()
\ No newline at end of file
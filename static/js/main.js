@@ -196,21 +196,6 @@ document.addEventListener('DOMContentLoaded', function() {
         window.print();
     };
 
-    // Check auction status periodically
-    function checkAuctionStatus() {
-        fetch('/api/check_auction_status')
-            .then(response => response.json())
-            .then(data => {
-                console.log('Auction status checked');
-            })
-            .catch(error => {
-                console.error('Error checking auction status:', error);
-            });
-    }
-
-    // Check auction status every 5 minutes
-    setInterval(checkAuctionStatus, 300000);
-
     // Mobile menu enhancement
     const navToggler = document.querySelector('.navbar-toggler');
     if (navToggler) {
@@ -0,0 +1,236 @@
+from concurrent.futures import ThreadPoolExecutor
+from werkzeug.utils import secure_filename
+import hashlib
+import io
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+import time
+import uuid
+import PIL
+from PIL import Image
+from config import Config
+from db_operations import db_manager
+
+# Pillow-SIMD builds report versions like '9.5.0.post1'
+PILLOW_SIMD = '.post' in PIL.__version__
+print(f"Artwork processing with Pillow {PIL.__version__}{' (SIMD)' if PILLOW_SIMD else ''}")
+
+# Background workers for artwork processing, so uploads don't block the request thread
+executor = ThreadPoolExecutor(max_workers=Config.IMAGE_WORKERS)
+
+# image_path of an auction whose upload could not be processed
+ARTWORK_FAILED = 'failed'
+
+def stage_artwork_upload(file):
+    """Persist the raw upload to the staging folder and return its path"""
+    filename = f"{uuid.uuid4().hex}_{secure_filename(file.filename)}"
+    staging_path = os.path.join(Config.UPLOAD_STAGING_FOLDER, filename)
+
+    # Large uploads are spooled by Werkzeug to a temp file; copy those in-kernel
+    # with sendfile(2) instead of reading them through Python
+    try:
+        src_fd = file.stream.fileno()
+    except (AttributeError, OSError, io.UnsupportedOperation):
+        src_fd = None
+
+    if src_fd is not None and hasattr(os, 'sendfile'):
+        size = os.fstat(src_fd).st_size
+        with open(staging_path, 'wb') as dst:
+            offset = 0
+            while offset < size:
+                sent = os.sendfile(dst.fileno(), src_fd, offset, size - offset)
+                if sent == 0:
+                    break
+                offset += sent
+    else:
+        file.save(staging_path)
+    return staging_path
+
+def save_artwork_image(source):
+    """Resize a staged image and save it as an optimized JPEG in the upload folder"""
+    try:
+        # Read the staged file once and decode from memory
+        with open(source, 'rb') as f:
+            data = f.read()
+
+        # Name files by content hash so identical uploads share one file
+        # and skip decoding entirely (e.g. 'ab/ab12...ef.jpg')
+        digest = hashlib.blake2b(data, digest_size=16).hexdigest()
+        filename = f"{digest[:2]}/{digest}.jpg"
+        filepath = os.path.join(Config.UPLOAD_FOLDER, filename)
+        if os.path.exists(filepath):
+            return filename
+        os.makedirs(os.path.dirname(filepath), exist_ok=True)
+
+        max_size = (Config.ARTWORK_MAX_SIZE, Config.ARTWORK_MAX_SIZE)
+        img = Image.open(io.BytesIO(data))
+
+        # Image.open only parses the header, so JPEGs that are already small enough
+        # and carry no metadata can be published without a decode/re-encode cycle
+        # (the re-encode below is what strips EXIF/GPS from the others)
+        if img.format == 'JPEG' and img.mode == 'RGB' and \
+           img.width <= max_size[0] and img.height <= max_size[1] and \
+           not has_jpeg_metadata(img):
+            save_thumbnails(img, filename)
+            write_atomic(filepath, lambda f: f.write(data))
+            optimize_jpeg(filepath)
+            img.close()
+            return filename
+
+        # Let libjpeg decode at a reduced scale (1/2, 1/4, 1/8) for large JPEGs;
+        # thumbnail() below still does the final LANCZOS resize
+        try:
+            img.draft('RGB', max_size)
+        except Exception:
+            pass
+
+        if img.mode in ('RGBA', 'LA', 'P'):
+            rgb_img = Image.new('RGB', img.size, (255, 255, 255))
+            rgb_img.paste(img, mask=img.split()[-1] if img.mode == 'RGBA' else None)
+            img = rgb_img
+
+        img.thumbnail(max_size, Image.Resampling.LANCZOS)
+        # Thumbnails first: once the full-size file exists, every size does
+        save_thumbnails(img, filename)
+        save_jpeg_atomic(img, filepath)
+        optimize_jpeg(filepath)
+        return filename
+    except Exception as e:
+        print(f"Error processing artwork image: {e}")
+        return None
+
+# JPEG segments that carry no personal data: JFIF header, ICC colour profile, Adobe
+_PLAIN_JPEG_SEGMENTS = frozenset({'APP0', 'APP2', 'APP14'})
+
+def has_jpeg_metadata(img):
+    """True if a JPEG has EXIF/XMP/IPTC segments or comments that a re-encode would drop"""
+    return 'comment' in img.info or \
+        any(marker not in _PLAIN_JPEG_SEGMENTS for marker, _ in img.applist)
+
+def thumbnail_name(filename, size):
+    """Filename of the given thumbnail size for a saved artwork image"""
+    return f"{os.path.splitext(filename)[0]}_{size}.jpg"
+
+# Content-hash names from save_artwork_image, e.g. 'ab/ab12...ef.jpg'
+_HASHED_ARTWORK_NAME = re.compile(r'[0-9a-f]{2}/[0-9a-f]{32}\.jpg')
+
+def has_thumbnails(filename):
+    """True if an artwork image has every thumbnail size, judged by its name alone
+
+    Content-hash names are only published after all their thumbnails are saved;
+    images uploaded before that naming only have the full size.
+    """
+    return _HASHED_ARTWORK_NAME.fullmatch(filename) is not None
+
+def save_thumbnails(img, filename):
+    """Save the smaller artwork sizes from an already decoded and resized image"""
+    for size in Config.THUMBNAIL_SIZES:
+        scale = min(size / img.width, size / img.height)
+        if scale < 1:
+            # Resample from the previous (next larger) size rather than the full
+            # image, so each step works on a quarter of the pixels
+            img = img.resize((max(1, round(img.width * scale)), max(1, round(img.height * scale))),
+                             Image.Resampling.LANCZOS)
+        thumb_path = os.path.join(Config.UPLOAD_FOLDER, thumbnail_name(filename, size))
+        save_jpeg_atomic(img, thumb_path)
+        optimize_jpeg(thumb_path)
+
+def save_jpeg_atomic(img, filepath):
+    """Encode straight to a temp file and rename it into place so readers never see a partial file"""
+    # Baseline 4:2:0 encoding is the fastest libjpeg path; jpegoptim can make it progressive later
+    write_atomic(filepath, lambda f: img.save(f, 'JPEG', quality=85, optimize=True,
+                                              progressive=False, subsampling=2))
+
+def write_atomic(filepath, write):
+    """Call write(f) on a new temp file next to filepath, then rename it into place"""
+    # A unique temp name per call: files are named by content hash, so two uploads
+    # of the same image write the same filepath at the same time
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(filepath), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            write(f)
+        # mkstemp creates the file owner-only; artwork is served by the web server
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, filepath)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def optimize_jpeg(filepath):
+    """Recompress a saved JPEG with jpegoptim (progressive, metadata stripped) if enabled"""
+    if not Config.JPEGOPTIM_ENABLED or not shutil.which('jpegoptim'):
+        return
+    try:
+        subprocess.run(['jpegoptim', '--strip-all', '--all-progressive', '-m85', '--quiet', filepath],
+                       check=True, timeout=30)
+    except (subprocess.SubprocessError, OSError) as e:
+        print(f"Error optimizing {filepath}: {e}")
+
+def queued_upload_path(auction_id, state='queued'):
+    """Staging path of an auction's upload while it is queued or being processed"""
+    return os.path.join(Config.UPLOAD_STAGING_FOLDER, f"{auction_id}.{state}")
+
+def process_artwork(auction_id, on_done=None):
+    """Process an auction's queued upload and attach the resulting image (or mark it failed)"""
+    # Claim the upload by renaming it; the recovery sweep may have queued it twice
+    working_path = queued_upload_path(auction_id, 'working')
+    try:
+        os.rename(queued_upload_path(auction_id), working_path)
+        os.utime(working_path)
+    except FileNotFoundError:
+        return
+
+    try:
+        filename = save_artwork_image(working_path)
+        db_manager.update_auction_image(auction_id, filename or ARTWORK_FAILED)
+    finally:
+        if os.path.exists(working_path):
+            os.remove(working_path)
+    if on_done:
+        on_done()
+
+def enqueue_artwork(staging_path, auction_id, on_done=None):
+    """Queue a staged upload for background processing
+
+    The file is renamed after its auction first, so recover_artwork_uploads can
+    find it again if this process exits before the job runs.
+    """
+    os.replace(staging_path, queued_upload_path(auction_id))
+    executor.submit(process_artwork, auction_id, on_done)
+
+def recover_artwork_uploads(on_done=None):
+    """Re-queue uploads a restart dropped, delete abandoned ones and fail auctions without one"""
+    stale_before = time.time() - Config.ARTWORK_STALE_AFTER
+    pending = set()
+    for name in os.listdir(Config.UPLOAD_STAGING_FOLDER):
+        path = os.path.join(Config.UPLOAD_STAGING_FOLDER, name)
+        auction_id, _, state = name.partition('.')
+        if state in ('queued', 'working') and auction_id.isdigit():
+            pending.add(int(auction_id))
+        try:
+            if os.path.getmtime(path) > stale_before:
+                continue
+            if state == 'working' and auction_id.isdigit():
+                # The process handling it died; hand it back to the queue
+                os.rename(path, queued_upload_path(auction_id))
+                state = 'queued'
+            if state == 'queued' and auction_id.isdigit():
+                executor.submit(process_artwork, int(auction_id), on_done)
+            else:
+                # Staged by a request that never created its auction
+                os.remove(path)
+        except FileNotFoundError:
+            # Another worker's sweep or job got to it first
+            continue
+
+    failed = [auction_id for auction_id in
+              db_manager.get_auctions_without_image(Config.ARTWORK_STALE_AFTER)
+              if auction_id not in pending]
+    for auction_id in failed:
+        db_manager.update_auction_image(auction_id, ARTWORK_FAILED)
+    if failed and on_done:
+        on_done()
@@ -0,0 +1,69 @@
+import os
+import re
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import pytest
+
+os.environ.setdefault('SCHEDULER_ENABLED', 'false')
+os.environ.setdefault('ARTWORK_RECOVERY_ENABLED', 'false')
+app_module = pytest.importorskip('app')
+
+NEXT_LINK = re.compile(r'href="[^"]*after=([^&"]*)&amp;after_id=(\d+)[^"]*">\s*Next')
+
+
+def make_auctions(count, with_bids):
+    """Active auctions sorted for "Most Bids"; only the first with_bids have bids"""
+    now = datetime.now()
+    return [{
+        'auction_id': auction_id,
+        'title': f'Artwork {auction_id}',
+        'description': '',
+        'image_path': None,
+        'category_id': None,
+        'category_name': None,
+        'seller_name': 'seller',
+        'current_bid': Decimal('10.00'),
+        'bid_count': 3 if auction_id <= with_bids else 0,
+        'end_time': now + timedelta(days=1),
+        'created_at': now,
+        'updated_at': now,
+    } for auction_id in range(1, count + 1)]
+
+
+@pytest.fixture
+def browse(monkeypatch):
+    auctions = make_auctions(30, with_bids=5)
+    calls = []
+
+    def fake_active_auctions(limit, sort_by, order, after_value=None, after_id=None, **filters):
+        calls.append((after_value, after_id))
+        assert sort_by == 'bid_count' and order == 'DESC'
+        rows = sorted(auctions, key=lambda a: (a['bid_count'], a['auction_id']), reverse=True)
+        if after_value is not None:
+            rows = [a for a in rows if (a['bid_count'], a['auction_id']) < (after_value, after_id)]
+        return rows[:limit]
+
+    monkeypatch.setattr(app_module, 'cached_active_auctions', fake_active_auctions)
+    monkeypatch.setattr(app_module, 'cached_categories', lambda: [])
+    monkeypatch.setattr(app_module, 'cached_auction_stats',
+                        lambda: {'total_active': 30, 'ending_today': 0, 'new_this_week': 0})
+    app_module.app.config['TESTING'] = True
+    return app_module.app.test_client(), calls
+
+
+def test_most_bids_pages_past_auctions_without_bids(browse):
+    client, calls = browse
+    seen = []
+    url = '/browse?sort=most_bids'
+    for _ in range(5):
+        html = client.get(url).get_data(as_text=True)
+        seen.extend(int(i) for i in re.findall(r'/auction/(\d+)', html))
+        match = NEXT_LINK.search(html)
+        if not match:
+            break
+        url = f'/browse?sort=most_bids&after={match.group(1)}&after_id={match.group(2)}'
+
+    # Later pages start after a bid_count == 0 cursor instead of repeating the first page
+    assert calls[1:] == [(0, 24), (0, 12)]
+    assert sorted(seen) == list(range(1, 31))
@@ -0,0 +1,154 @@
+-- Upgrade Script
+-- Brings a database created from an earlier database.sql (with the wallet
+-- tables) up to the current schema. Steps run in order and each one checks the
+-- schema first, so the script can be re-run safely:
+--   mysql -u root -p < upgrade.sql
+
+USE art_auction_db;
+
+DELIMITER //
+
+DROP FUNCTION IF EXISTS upgrade_has_column//
+CREATE FUNCTION upgrade_has_column(tbl VARCHAR(64), col VARCHAR(64)) RETURNS BOOLEAN
+READS SQL DATA
+BEGIN
+    RETURN EXISTS (SELECT 1 FROM information_schema.COLUMNS
+                   WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = tbl AND COLUMN_NAME = col);
+END//
+
+-- Number of columns in an index, 0 when it does not exist
+DROP FUNCTION IF EXISTS upgrade_index_columns//
+CREATE FUNCTION upgrade_index_columns(tbl VARCHAR(64), idx VARCHAR(64)) RETURNS INT
+READS SQL DATA
+BEGIN
+    RETURN (SELECT COUNT(*) FROM information_schema.STATISTICS
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = tbl AND INDEX_NAME = idx);
+END//
+
+DROP PROCEDURE IF EXISTS upgrade_schema//
+CREATE PROCEDURE upgrade_schema()
+BEGIN
+    -- Step 1: Bid summary kept on the auction row by place_bid
+    -- (bid_count is the number of distinct bidders)
+    IF NOT upgrade_has_column('auctions', 'bid_count') THEN
+        ALTER TABLE auctions
+            ADD COLUMN bid_count INT NOT NULL DEFAULT 0 AFTER current_bid,
+            ADD COLUMN top_bidder_id INT DEFAULT NULL AFTER bid_count;
+        UPDATE auctions a
+        SET a.bid_count = (SELECT COUNT(DISTINCT b.bidder_id) FROM bids b
+                           WHERE b.auction_id = a.auction_id),
+            a.top_bidder_id = (SELECT b.bidder_id FROM bids b
+                               WHERE b.auction_id = a.auction_id
+                               ORDER BY b.bid_amount DESC, b.bid_time ASC
+                               LIMIT 1);
+    END IF;
+
+    -- Price filters compare current_bid directly, so it is never NULL
+    UPDATE auctions SET current_bid = starting_bid WHERE current_bid IS NULL;
+
+    -- Step 2: Last-modified time for page ETags
+    IF NOT upgrade_has_column('auctions', 'updated_at') THEN
+        ALTER TABLE auctions
+            ADD COLUMN updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                ON UPDATE CURRENT_TIMESTAMP AFTER created_at;
+    END IF;
+
+    -- Step 3: Running total of a seller's received payments
+    IF NOT upgrade_has_column('users', 'total_earned') THEN
+        ALTER TABLE users
+            ADD COLUMN total_earned DECIMAL(12, 2) NOT NULL DEFAULT 0.00 AFTER wallet_balance;
+        UPDATE users u
+        SET u.total_earned = (SELECT COALESCE(SUM(t.amount), 0) FROM wallet_transactions t
+                              WHERE t.user_id = u.user_id
+                              AND t.transaction_type = 'payment_received');
+    END IF;
+
+    -- Step 4: Last run of periodic jobs, so only one worker process runs each sweep
+    CREATE TABLE IF NOT EXISTS system_jobs (
+        name VARCHAR(50) PRIMARY KEY,
+        last_run DATETIME NOT NULL DEFAULT '1970-01-01 00:00:00'
+    );
+    INSERT IGNORE INTO system_jobs (name) VALUES ('close_expired_auctions');
+
+    -- Step 5: Auction indexes, one per browse path. Drop the ones they replace
+    -- first; idx_active was briefly (status, end_time, category_id, current_bid)
+    IF upgrade_index_columns('auctions', 'idx_status') > 0 THEN
+        ALTER TABLE auctions DROP INDEX idx_status;
+    END IF;
+    IF upgrade_index_columns('auctions', 'idx_end_time') > 0 THEN
+        ALTER TABLE auctions DROP INDEX idx_end_time;
+    END IF;
+    IF upgrade_index_columns('auctions', 'idx_created_at') > 0 THEN
+        ALTER TABLE auctions DROP INDEX idx_created_at;
+    END IF;
+    IF upgrade_index_columns('auctions', 'idx_category_price') > 0 THEN
+        ALTER TABLE auctions DROP INDEX idx_category_price;
+    END IF;
+    IF upgrade_index_columns('auctions', 'idx_bid_count') > 0 THEN
+        ALTER TABLE auctions DROP INDEX idx_bid_count;
+    END IF;
+    IF upgrade_index_columns('auctions', 'idx_active') > 2 THEN
+        ALTER TABLE auctions DROP INDEX idx_active;
+    END IF;
+
+    IF upgrade_index_columns('auctions', 'idx_active') = 0 THEN
+        ALTER TABLE auctions ADD KEY idx_active (status, end_time);
+    END IF;
+    IF upgrade_index_columns('auctions', 'idx_status_created') = 0 THEN
+        ALTER TABLE auctions ADD KEY idx_status_created (status, created_at);
+    END IF;
+    IF upgrade_index_columns('auctions', 'idx_status_price') = 0 THEN
+        ALTER TABLE auctions ADD KEY idx_status_price (status, current_bid);
+    END IF;
+    IF upgrade_index_columns('auctions', 'idx_status_bids') = 0 THEN
+        ALTER TABLE auctions ADD KEY idx_status_bids (status, bid_count);
+    END IF;
+    IF upgrade_index_columns('auctions', 'idx_category_end') = 0 THEN
+        ALTER TABLE auctions ADD KEY idx_category_end (status, category_id, end_time);
+    END IF;
+    IF upgrade_index_columns('auctions', 'ft_title_desc') = 0 THEN
+        ALTER TABLE auctions ADD FULLTEXT KEY ft_title_desc (title, description);
+    END IF;
+    IF upgrade_index_columns('auctions', 'idx_winner_payment') = 0 THEN
+        ALTER TABLE auctions ADD KEY idx_winner_payment (winner_id, status, payment_status, end_time);
+    END IF;
+
+    -- Step 6: Bid history by auction and time; added before idx_auction is
+    -- dropped, since the auction_id foreign key needs one of them
+    IF upgrade_index_columns('bids', 'idx_auction_time') = 0 THEN
+        ALTER TABLE bids ADD KEY idx_auction_time (auction_id, bid_time);
+    END IF;
+    IF upgrade_index_columns('bids', 'idx_auction') > 0 THEN
+        ALTER TABLE bids DROP INDEX idx_auction;
+    END IF;
+
+    -- Step 7: Latest notifications per user
+    IF upgrade_index_columns('notifications', 'idx_user_created') = 0 THEN
+        ALTER TABLE notifications ADD KEY idx_user_created (user_id, created_at);
+    END IF;
+END//
+
+DELIMITER ;
+
+CALL upgrade_schema();
+
+DROP PROCEDURE upgrade_schema;
+DROP FUNCTION upgrade_index_columns;
+DROP FUNCTION upgrade_has_column;
+
+-- Step 8: Recreate the view, since a.* is expanded when it is created and
+-- already includes bid_count
+CREATE OR REPLACE VIEW active_auctions_view AS
+SELECT
+    a.*,
+    u.username as seller_name,
+    c.category_name,
+    a.current_bid as highest_bid
+FROM auctions a
+LEFT JOIN users u ON a.seller_id = u.user_id
+LEFT JOIN categories c ON a.category_id = c.category_id
+WHERE a.status = 'active' AND a.end_time > NOW();
+
+-- Verify the changes
+SHOW INDEX FROM auctions;
+DESCRIBE auctions;